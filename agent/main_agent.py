@@ -1,34 +1,144 @@
-from typing import List, Tuple
+import asyncio
+import time
+from typing import AsyncIterator, Dict, List, Optional, Tuple, Union
+
+import httpx
 from langchain_core.messages import BaseMessage, HumanMessage, AIMessage, SystemMessage
 from langchain_ollama import ChatOllama
 from langchain_openai import ChatOpenAI
 
 from logger.logger import logger
+from rate_limiter.rate_limiter import estimate_tokens
 from settings import settings
+from tracing.tracer_setup import tracer
+from usage.usage_setup import usage_ledger
+
+
+http_limits = httpx.Limits(
+    max_connections=settings.LLM_HTTP_MAX_CONNECTIONS,
+    max_keepalive_connections=settings.LLM_HTTP_MAX_KEEPALIVE_CONNECTIONS,
+    keepalive_expiry=settings.LLM_HTTP_KEEPALIVE_EXPIRY,
+)
+http_timeout = httpx.Timeout(settings.LLM_HTTP_TIMEOUT, connect=10.0)
+
+_http_client: Optional[httpx.AsyncClient] = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """
+    Return the pooled HTTP client shared by all OpenAI models, creating it on first use.
+
+    Returns:
+        httpx.AsyncClient: The shared client with keep-alive connections.
+    """
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = httpx.AsyncClient(limits=http_limits, timeout=http_timeout)
+    return _http_client
+
+
+async def close_http_client() -> None:
+    """
+    Close the shared HTTP client and its pooled connections.
+    """
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+
+
+def _parse_keep_alive(value: str) -> Union[int, str]:
+    """
+    Convert the keep alive setting to the type Ollama expects: seconds as int, durations as str.
+    """
+    try:
+        return int(value)
+    except ValueError:
+        return value
 
 
 class MainAgent:
-    def __init__(self) -> None:
+    def __init__(self, limits: Optional[httpx.Limits] = None) -> None:
         """
         Initialize the agent by selecting the appropriate model based on settings.
 
         If the `LLM_NAME` setting is 'ollama', use the ChatOllama model;
-        otherwise, use the ChatOpenAI model.
+        otherwise, use the ChatOpenAI model. Both keep their HTTP connections alive
+        between requests, and Ollama keeps the model loaded for `OLLAMA_KEEP_ALIVE`.
+
+        Args:
+            limits (Optional[httpx.Limits]): Connection limits for a dedicated connection pool.
+                                             The shared pool is used if omitted.
         """
+        self._http_client: Optional[httpx.AsyncClient] = (
+            httpx.AsyncClient(limits=limits, timeout=http_timeout) if limits else None
+        )
         self.model = (
             ChatOllama(
                 model=settings.OLLAMA_MODEL,
                 base_url=settings.OLLAMA_URL,
+                keep_alive=_parse_keep_alive(settings.OLLAMA_KEEP_ALIVE),
+                client_kwargs={"limits": limits or http_limits, "timeout": http_timeout},
             )
             if settings.LLM_NAME == "ollama"
             else ChatOpenAI(
                 model_name=settings.OPENAI_MODEL,
                 openai_api_key=settings.OPENAI_API_KEY,
+                http_async_client=self._http_client or get_http_client(),
             )
         )
         self.role_description_file: str = "agent_role.md"
         self.prompt_template = self._load_agent_role
 
+    async def _first_token_latency(self) -> float:
+        """
+        Send a one-token request to the model and measure the time until the first token arrives.
+
+        Returns:
+            float: The first token latency in seconds.
+        """
+        model = (
+            self.model.bind(options={"num_predict": 1})
+            if isinstance(self.model, ChatOllama)
+            else self.model.bind(max_tokens=1)
+        )
+        started_at = time.perf_counter()
+        first_token_at: Optional[float] = None
+        async for _ in model.astream([HumanMessage("Hi")]):
+            if first_token_at is None:
+                first_token_at = time.perf_counter()
+        return (first_token_at or time.perf_counter()) - started_at
+
+    async def warm_up(self) -> Dict[str, float]:
+        """
+        Load the model and open a pooled connection before the first chat turn.
+
+        Two tiny requests are sent: the first one pays for the model load and the
+        connection handshake, the second one shows the warm latency.
+
+        Returns:
+            Dict[str, float]: The cold and warm first token latencies in seconds,
+                              or an empty dict if the warm-up failed.
+        """
+        try:
+            cold: float = await self._first_token_latency()
+            warm: float = await self._first_token_latency()
+        except Exception as ex:
+            logger.error(f"An error occurred in LLM warm-up: {ex}")
+            return {}
+
+        logger.info(
+            f"LLM warm-up finished: cold first token {cold:.3f}s, warm first token {warm:.3f}s"
+        )
+        return {"cold_first_token_seconds": cold, "warm_first_token_seconds": warm}
+
+    async def aclose(self) -> None:
+        """
+        Close the dedicated connection pool of the agent, if it has one.
+        """
+        if self._http_client is not None:
+            await self._http_client.aclose()
+
     @staticmethod
     async def _load_agent_role() -> str:
         """
@@ -68,28 +178,126 @@ class MainAgent:
         except KeyError as e:
             raise ValueError(f"Unknown role: {e}")
 
+    @staticmethod
+    def _record_usage(
+        *,
+        user_id: int,
+        messages: List[BaseMessage],
+        result: AIMessage,
+        latency_ms: float,
+    ) -> None:
+        """
+        Add the token counts and latency of a reply to the usage ledger.
+
+        Token counts reported by the model are used when available, otherwise they are estimated from the text.
+
+        Args:
+            user_id (int): The user the reply was generated for.
+            messages (List[BaseMessage]): The prompt messages.
+            result (AIMessage): The model reply.
+            latency_ms (float): The generation latency in milliseconds.
+        """
+        usage = result.usage_metadata or {}
+        usage_ledger.record(
+            user_id=user_id,
+            prompt_tokens=usage.get("input_tokens")
+            or sum(estimate_tokens(str(message.content)) for message in messages),
+            completion_tokens=usage.get("output_tokens") or estimate_tokens(str(result.content)),
+            latency_ms=latency_ms,
+        )
+
     async def generate_response(
         self,
         *,
         chat_history: List[Tuple[str, str]],
+        user_id: Optional[int] = None,
     ) -> str:
         """
         Generate a response from the model based on the provided chat history.
 
         Args:
             chat_history (List[Tuple[str, str]]): The conversation history used to generate the response.
+            user_id (Optional[int]): The user to account the token usage to.
 
         Returns:
             str: The model's generated response based on the chat history.
         """
         logger.info("Generating LLM answer process is started")
 
-        prompt: str = await self.prompt_template()
-        new_chat_history = self.messages_to_prompt(chat_history)
+        with tracer.span("agent.prompt_assembly", history_length=len(chat_history)):
+            prompt: str = await self.prompt_template()
+            new_chat_history = self.messages_to_prompt(chat_history)
+
+            messages = [SystemMessage(prompt)] + new_chat_history
 
-        messages = [SystemMessage(prompt)] + new_chat_history
+        with tracer.span("agent.model_call", model=settings.LLM_NAME):
+            started_at = time.perf_counter()
+            result = await self.model.ainvoke(messages)
+            latency_ms: float = (time.perf_counter() - started_at) * 1000
 
-        result = await self.model.ainvoke(messages)
+        if user_id is not None:
+            self._record_usage(user_id=user_id, messages=messages, result=result, latency_ms=latency_ms)
 
         logger.info("LLM answer generated successfully")
         return result.content
+
+    async def generate_batch(
+        self,
+        *,
+        chat_histories: List[List[Tuple[str, str]]],
+        max_concurrency: int,
+        user_id: Optional[int] = None,
+    ) -> AsyncIterator[Tuple[int, Union[str, Exception]]]:
+        """
+        Generate responses for many conversations concurrently.
+
+        Every conversation runs as its own task, at most `max_concurrency` at once. Closing the
+        generator early (e.g. when the client disconnects) cancels the tasks that are still running.
+
+        Args:
+            chat_histories (List[List[Tuple[str, str]]]): The conversations to answer.
+            max_concurrency (int): The maximum number of requests in flight at once.
+            user_id (Optional[int]): The user to account the token usage to.
+
+        Yields:
+            Tuple[int, Union[str, Exception]]: The index of the conversation and its response,
+                                               or the exception raised for it, in completion order.
+        """
+        logger.info(f"Batch generation of {len(chat_histories)} answers is started")
+
+        prompt: str = await self.prompt_template()
+        inputs: List[List[BaseMessage]] = [
+            [SystemMessage(prompt)] + self.messages_to_prompt(chat_history)
+            for chat_history in chat_histories
+        ]
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def answer(index: int) -> Tuple[int, Union[str, Exception]]:
+            try:
+                async with semaphore:
+                    # Timed per call, without the wait for a concurrency slot, like a chat reply.
+                    started_at = time.perf_counter()
+                    result = await self.model.ainvoke(inputs[index])
+                    latency_ms: float = (time.perf_counter() - started_at) * 1000
+            except Exception as ex:
+                return index, ex
+            # Recorded here rather than when yielded, so replies finished before a cancellation are counted too.
+            if user_id is not None:
+                self._record_usage(
+                    user_id=user_id,
+                    messages=inputs[index],
+                    result=result,
+                    latency_ms=latency_ms,
+                )
+            return index, result.content
+
+        tasks: List[asyncio.Task] = [asyncio.create_task(answer(index)) for index in range(len(inputs))]
+        try:
+            for next_answer in asyncio.as_completed(tasks):
+                yield await next_answer
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+        logger.info("Batch generation finished")
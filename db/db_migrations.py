@@ -0,0 +1,42 @@
+from tortoise import connections
+
+from db.db_models import MessageModel, ConversationModel
+from db.db_singleton import PRIMARY_CONNECTION
+from logger.logger import logger
+
+LEGACY_CONVERSATION_TITLE: str = "Previous messages"
+
+
+async def migrate_legacy_messages() -> None:
+    """
+    Bring a database created before conversation threads up to date.
+
+    `Tortoise.generate_schemas` only creates missing tables, so the `conversation_id` column is
+    added to an existing message table here. Every user's messages without a conversation are then
+    moved into one conversation, so they stay visible. Both steps do nothing on an up-to-date database.
+    """
+    message_table: str = MessageModel._meta.db_table
+    conversation_table: str = ConversationModel._meta.db_table
+    connection = connections.get(PRIMARY_CONNECTION)
+    try:
+        await connection.execute_script(
+            f'ALTER TABLE "{message_table}" ADD COLUMN IF NOT EXISTS "conversation_id" INT '
+            f'REFERENCES "{conversation_table}" ("id") ON DELETE CASCADE'
+        )
+        _, rows = await connection.execute_query(
+            f'WITH "legacy" AS ('
+            f'INSERT INTO "{conversation_table}" ("user_id", "title", "created_at") '
+            f'SELECT "user_id", $1, MIN("created_at") FROM "{message_table}" '
+            f'WHERE "conversation_id" IS NULL GROUP BY "user_id" '
+            f'RETURNING "id", "user_id") '
+            f'UPDATE "{message_table}" SET "conversation_id" = "legacy"."id" FROM "legacy" '
+            f'WHERE "{message_table}"."user_id" = "legacy"."user_id" '
+            f'AND "{message_table}"."conversation_id" IS NULL '
+            f'RETURNING "{message_table}"."id"',
+            [LEGACY_CONVERSATION_TITLE],
+        )
+        if rows:
+            logger.info(f"Moved {len(rows)} legacy messages into conversations")
+    except Exception as ex:
+        logger.error(f"An error occurred in migrating legacy messages: {ex}")
+        raise ex
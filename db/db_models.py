@@ -11,8 +11,27 @@ class UserModel(CommonModel):
     hashed_password: str = fields.CharField(max_length=128)
 
 
+class ConversationModel(CommonModel):
+    user: "UserModel" = fields.ForeignKeyField("models.UserModel", related_name="conversations")
+    title: str = fields.CharField(max_length=100)
+
+
 class MessageModel(CommonModel):
     user: "UserModel" = fields.ForeignKeyField("models.UserModel", related_name="messages")
+    conversation: "ConversationModel" = fields.ForeignKeyField(
+        "models.ConversationModel", related_name="messages", null=True
+    )
     content: str = fields.TextField()
     role: str = fields.CharField(max_length=10)
 
+
+class UsageRollupModel(CommonModel):
+    user: "UserModel" = fields.ForeignKeyField("models.UserModel", related_name="usage_rollups")
+    bucket_start: fields.DatetimeField = fields.DatetimeField()
+    prompt_tokens: int = fields.BigIntField(default=0)
+    completion_tokens: int = fields.BigIntField(default=0)
+    replies: int = fields.IntField(default=0)
+    total_latency_ms: float = fields.FloatField(default=0)
+
+    class Meta:
+        unique_together = (("user", "bucket_start"),)
@@ -1,8 +1,14 @@
-from typing import Union, List, Dict
-from db.db_models import UserModel, MessageModel
+from datetime import datetime, timezone
+from typing import Any, Union, List, Dict, Optional, Tuple
+from tortoise import connections
+from db.db_models import UserModel, MessageModel, ConversationModel, UsageRollupModel
+from db.db_setup import DB
+from db.db_singleton import PRIMARY_CONNECTION
 from logger.logger import logger
+from tracing.tracer_setup import tracer
 
 
+@tracer.traced("db.get_user")
 async def get_user(*, username: str) -> Union[UserModel, None]:
     """
     Retrieve a user by their username.
@@ -14,12 +20,16 @@ async def get_user(*, username: str) -> Union[UserModel, None]:
         Union[UserModel, None]: The user if found, otherwise None.
     """
     try:
-        return await UserModel.get_or_none(username=username)
+        return await DB.run_read(
+            username,
+            lambda connection: UserModel.filter(username=username).using_db(connection).first(),
+        )
     except Exception as ex:
         logger.error(f"An error occurred in getting user from db: {ex}")
         raise ex
 
 
+@tracer.traced("db.create_user")
 async def create_user(*, username: str, hashed_pass: str) -> None:
     """
     Create a new user and store them in the database with a hashed password.
@@ -35,50 +45,236 @@ async def create_user(*, username: str, hashed_pass: str) -> None:
         await UserModel.create(
             username=username, hashed_password=hashed_pass
         )
+        DB.mark_write(username)
         logger.info(f"User {username} created successfully")
     except Exception as ex:
         logger.error(f"An error occurred in creating user method: {ex}")
         raise ex
 
 
-async def get_chat_history(*, user: UserModel) -> List[MessageModel]:
+@tracer.traced("db.create_conversation")
+async def create_conversation(*, user: UserModel, title: str) -> ConversationModel:
+    """
+    Create a new conversation thread for a given user.
+
+    Args:
+        user (UserModel): The user who owns the conversation.
+        title (str): The title of the conversation.
+
+    Returns:
+        ConversationModel: The created conversation.
+    """
+    try:
+        conversation = await ConversationModel.create(user=user, title=title)
+        DB.mark_write(user.username)
+        logger.info(f"Conversation {conversation.id} created for user {user.username}")
+        return conversation
+    except Exception as ex:
+        logger.error(f"An error occurred in creating conversation method: {ex}")
+        raise ex
+
+
+@tracer.traced("db.get_conversations")
+async def get_conversations(*, user: UserModel) -> List[ConversationModel]:
     """
-    Retrieve the chat history for a given user.
+    Retrieve all conversation threads of a given user, newest first.
+
+    Args:
+        user (UserModel): The user whose conversations are to be fetched.
+
+    Returns:
+        List[ConversationModel]: A list of conversations owned by the user.
+    """
+    try:
+        return await DB.run_read(
+            user.username,
+            lambda connection: ConversationModel.filter(user=user).order_by("-created_at").using_db(connection),
+        )
+    except Exception as ex:
+        logger.error(f"An error occurred in getting conversations method: {ex}")
+        raise ex
+
+
+@tracer.traced("db.get_conversation")
+async def get_conversation(*, user: UserModel, conversation_id: int) -> Union[ConversationModel, None]:
+    """
+    Retrieve a single conversation thread owned by a given user.
+
+    Args:
+        user (UserModel): The user who owns the conversation.
+        conversation_id (int): The id of the conversation.
+
+    Returns:
+        Union[ConversationModel, None]: The conversation if found, otherwise None.
+    """
+    try:
+        return await DB.run_read(
+            user.username,
+            lambda connection: ConversationModel.filter(
+                id=conversation_id, user=user
+            ).using_db(connection).first(),
+        )
+    except Exception as ex:
+        logger.error(f"An error occurred in getting conversation method: {ex}")
+        raise ex
+
+
+@tracer.traced("db.get_chat_history")
+async def get_chat_history(*, user: UserModel, conversation: ConversationModel) -> List[MessageModel]:
+    """
+    Retrieve the chat history of a single conversation thread.
 
     Args:
         user (UserModel): The user whose chat history is to be fetched.
+        conversation (ConversationModel): The conversation to load messages from.
 
     Returns:
-        List[MessageModel]: A list of messages associated with the user.
+        List[MessageModel]: A list of messages in the conversation, oldest first.
     """
     try:
         if user:
-            return await MessageModel.filter(user=user)
+            return await DB.run_read(
+                user.username,
+                lambda connection: MessageModel.filter(
+                    user=user, conversation=conversation
+                ).order_by("created_at").using_db(connection),
+            )
         logger.error(f"User {user.username} didn't found")
     except Exception as ex:
         logger.error(f"An error occurred in getting chat history method: {ex}")
         raise ex
 
 
-async def save_message_to_db(*, user: UserModel, message: Dict[str, str]) -> None:
+@tracer.traced("db.save_message_to_db")
+async def save_message_to_db(
+    *,
+    user: UserModel,
+    conversation: ConversationModel,
+    message: Dict[str, str],
+) -> Optional[MessageModel]:
     """
     Save a new message to the database.
 
     Args:
         user (UserModel): The user who sent the message.
+        conversation (ConversationModel): The conversation the message belongs to.
         message (Dict[str, str]): The message data to be saved, containing "content" and "role".
 
     Returns:
-        None: This function does not return anything.
+        Optional[MessageModel]: The saved message, or None if there is no user.
     """
     try:
         if user:
-            await MessageModel.create(
+            saved_message = await MessageModel.create(
                 user=user,
+                conversation=conversation,
                 content=message["content"],
                 role=message["role"]
             )
+            DB.mark_write(user.username)
             logger.info(f"Message saved to db successfully: {message}")
+            return saved_message
     except Exception as ex:
         logger.error(f"An error occurred in saving message to db method: {ex}")
         raise ex
+
+
+@tracer.traced("db.get_messages_after")
+async def get_messages_after(
+    *,
+    user: UserModel,
+    conversation: ConversationModel,
+    message_id: int,
+) -> List[MessageModel]:
+    """
+    Retrieve the messages of a conversation saved after a given message.
+
+    Always reads from the primary: it serves clients resuming right after a restart,
+    when the read-your-writes window of the previous worker is gone.
+
+    Args:
+        user (UserModel): The owner of the conversation.
+        conversation (ConversationModel): The conversation to load messages from.
+        message_id (int): The id of the last message the client has.
+
+    Returns:
+        List[MessageModel]: The newer messages, oldest first.
+    """
+    try:
+        return await MessageModel.filter(
+            user=user, conversation=conversation, id__gt=message_id
+        ).order_by("id")
+    except Exception as ex:
+        logger.error(f"An error occurred in getting messages after method: {ex}")
+        raise ex
+
+
+# Reads of the usage rollups stay on the primary for a moment after a flush, like a user's own writes.
+USAGE_ROLLUPS_KEY: str = "usage_rollups"
+
+
+@tracer.traced("db.save_usage_rollups")
+async def save_usage_rollups(*, rows: List[Tuple[int, datetime, int, int, int, float]]) -> None:
+    """
+    Add aggregated usage counters to the rollup table in a single batched upsert.
+
+    Args:
+        rows (List[Tuple[int, datetime, int, int, int, float]]): One
+            (user_id, bucket_start, prompt_tokens, completion_tokens, replies, total_latency_ms)
+            tuple per user and time bucket.
+
+    Returns:
+        None: This function does not return anything.
+    """
+    table: str = UsageRollupModel._meta.db_table
+    query: str = (
+        f'INSERT INTO "{table}" ("user_id", "bucket_start", "prompt_tokens", "completion_tokens", '
+        f'"replies", "total_latency_ms", "created_at") VALUES ($1, $2, $3, $4, $5, $6, $7) '
+        f'ON CONFLICT ("user_id", "bucket_start") DO UPDATE SET '
+        f'"prompt_tokens" = "{table}"."prompt_tokens" + EXCLUDED."prompt_tokens", '
+        f'"completion_tokens" = "{table}"."completion_tokens" + EXCLUDED."completion_tokens", '
+        f'"replies" = "{table}"."replies" + EXCLUDED."replies", '
+        f'"total_latency_ms" = "{table}"."total_latency_ms" + EXCLUDED."total_latency_ms"'
+    )
+    try:
+        now = datetime.now(timezone.utc)
+        await connections.get(PRIMARY_CONNECTION).execute_many(
+            query, [list(row) + [now] for row in rows]
+        )
+        DB.mark_write(USAGE_ROLLUPS_KEY)
+        logger.info(f"Usage rollups saved to db successfully: {len(rows)} rows")
+    except Exception as ex:
+        logger.error(f"An error occurred in saving usage rollups method: {ex}")
+        raise ex
+
+
+@tracer.traced("db.get_usage_rollups")
+async def get_usage_rollups(*, since: datetime, username: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    Retrieve usage rollups starting from a given time, optionally for a single user.
+
+    Args:
+        since (datetime): The earliest bucket start to include.
+        username (Optional[str]): Restrict the rollups to this user.
+
+    Returns:
+        List[Dict[str, Any]]: The rollups, newest bucket first.
+    """
+    filters: Dict[str, Any] = {"bucket_start__gte": since}
+    if username:
+        filters["user__username"] = username
+    try:
+        return await DB.run_read(
+            USAGE_ROLLUPS_KEY,
+            lambda connection: UsageRollupModel.filter(**filters).order_by("-bucket_start").using_db(connection).values(
+                "bucket_start",
+                "prompt_tokens",
+                "completion_tokens",
+                "replies",
+                "total_latency_ms",
+                username="user__username",
+            ),
+        )
+    except Exception as ex:
+        logger.error(f"An error occurred in getting usage rollups method: {ex}")
+        raise ex
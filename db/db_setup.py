@@ -4,6 +4,9 @@ from settings import settings
 
 DB = PostgresDB(
     dsn=f"postgres://{settings.POSTGRES_USER}:{settings.POSTGRES_PASSWORD}"
-        f"@{settings.POSTGRES_HOST}:{settings.POSTGRES_PORT}/{settings.POSTGRES_DB}"
+        f"@{settings.POSTGRES_HOST}:{settings.POSTGRES_PORT}/{settings.POSTGRES_DB}",
+    replica_dsns=[dsn.strip() for dsn in settings.POSTGRES_REPLICA_DSNS.split(",") if dsn.strip()],
+    read_your_writes_seconds=settings.POSTGRES_READ_YOUR_WRITES_SECONDS,
+    health_check_interval=settings.POSTGRES_REPLICA_HEALTH_CHECK_SECONDS,
 )
 
@@ -1,6 +1,16 @@
+import asyncio
+import itertools
+import time
 from threading import Lock
-from tortoise import Tortoise
-from typing import Optional
+from tortoise import Tortoise, connections
+from tortoise.backends.base.client import BaseDBAsyncClient
+from typing import Awaitable, Callable, Dict, List, Optional, Set, TypeVar
+
+from logger.logger import logger
+
+T = TypeVar("T")
+
+PRIMARY_CONNECTION: str = "default"
 
 
 class PostgresDB:
@@ -17,30 +27,135 @@ class PostgresDB:
                     cls._instance = super().__new__(cls)
         return cls._instance
 
-    def __init__(self, dsn: str) -> None:
+    def __init__(
+        self,
+        dsn: str,
+        replica_dsns: Optional[List[str]] = None,
+        read_your_writes_seconds: float = 5.0,
+        health_check_interval: float = 10.0,
+    ) -> None:
         """
         Initialize the database connection.
 
         Args:
-            dsn (str): The database connection string.
+            dsn (str): The primary database connection string.
+            replica_dsns (Optional[List[str]]): Connection strings of read replicas.
+            read_your_writes_seconds (float): How long reads of a key go to the primary after a write of that key.
+            health_check_interval (float): Seconds between replica health checks.
         """
         if not hasattr(self, "_dsn"):
             self._dsn = dsn
+            self._replicas: Dict[str, str] = {
+                f"replica_{index}": replica_dsn
+                for index, replica_dsn in enumerate(replica_dsns or [])
+            }
+            self._healthy_replicas: Set[str] = set(self._replicas)
+            self._round_robin = itertools.count()
+            self._read_your_writes_seconds = read_your_writes_seconds
+            self._health_check_interval = health_check_interval
+            self._recent_writes: Dict[str, float] = {}
+            self._health_check_task: Optional[asyncio.Task] = None
 
     async def init_orm(self) -> None:
         """
-        Initialize the ORM and generate database schemas.
+        Initialize the ORM, register replica connections and generate database schemas on the primary.
         """
         await Tortoise.init(
-            db_url=self._dsn,
-            modules={"models": ["db.db_models"]},
+            config={
+                "connections": {PRIMARY_CONNECTION: self._dsn, **self._replicas},
+                "apps": {
+                    "models": {
+                        "models": ["db.db_models"],
+                        "default_connection": PRIMARY_CONNECTION,
+                    }
+                },
+            }
         )
         await Tortoise.generate_schemas()
+        if self._replicas:
+            self._health_check_task = asyncio.create_task(self._health_check_loop())
 
     async def close_orm(self) -> None:
         """
         Close all database connections.
         """
+        if self._health_check_task:
+            self._health_check_task.cancel()
+            self._health_check_task = None
         await Tortoise.close_connections()
 
+    def mark_write(self, key: str) -> None:
+        """
+        Remember that `key` (usually a username) has just written, so its reads stay on the primary
+        for the read-your-writes window. The window is tracked per worker process.
+
+        Args:
+            key (str): The writer key.
+        """
+        self._recent_writes[key] = time.monotonic()
+
+    def read_connection_name(self, key: Optional[str] = None) -> str:
+        """
+        Choose the connection for a read-only query.
+
+        Args:
+            key (Optional[str]): The reader key used for the read-your-writes guard.
+
+        Returns:
+            str: The primary connection name if the key wrote recently or no replica is healthy,
+                 otherwise the next healthy replica in round-robin order.
+        """
+        if key is not None and key in self._recent_writes:
+            if time.monotonic() - self._recent_writes[key] < self._read_your_writes_seconds:
+                return PRIMARY_CONNECTION
+            self._recent_writes.pop(key, None)
+
+        healthy: List[str] = sorted(self._healthy_replicas)
+        if not healthy:
+            return PRIMARY_CONNECTION
+        return healthy[next(self._round_robin) % len(healthy)]
+
+    async def run_read(self, key: Optional[str], query: Callable[[BaseDBAsyncClient], Awaitable[T]]) -> T:
+        """
+        Run a read-only query on a replica, falling back to the primary if the replica fails.
+
+        Args:
+            key (Optional[str]): The reader key used for the read-your-writes guard.
+            query (Callable[[BaseDBAsyncClient], Awaitable[T]]): Builds and runs the query on the given connection.
+
+        Returns:
+            T: The query result.
+        """
+        connection_name: str = self.read_connection_name(key)
+        if connection_name == PRIMARY_CONNECTION:
+            return await query(connections.get(PRIMARY_CONNECTION))
+        try:
+            return await query(connections.get(connection_name))
+        except Exception as ex:
+            logger.error(f"Read from {connection_name} failed, falling back to primary: {ex}")
+            self._healthy_replicas.discard(connection_name)
+            return await query(connections.get(PRIMARY_CONNECTION))
+
+    async def _health_check_loop(self) -> None:
+        """
+        Periodically ping every replica and keep the set of healthy ones up to date.
+        """
+        while True:
+            for name in self._replicas:
+                try:
+                    await connections.get(name).execute_query("SELECT 1")
+                    if name not in self._healthy_replicas:
+                        logger.info(f"Replica {name} is healthy again")
+                    self._healthy_replicas.add(name)
+                except Exception as ex:
+                    if name in self._healthy_replicas:
+                        logger.error(f"Replica {name} failed health check: {ex}")
+                    self._healthy_replicas.discard(name)
 
+            now = time.monotonic()
+            self._recent_writes = {
+                key: written_at
+                for key, written_at in self._recent_writes.items()
+                if now - written_at < self._read_your_writes_seconds
+            }
+            await asyncio.sleep(self._health_check_interval)
@@ -1,23 +1,45 @@
 from fastapi import FastAPI
 from fastapi.routing import APIRouter
 
+from agent.main_agent import close_http_client
+from db.db_migrations import migrate_legacy_messages
 from db.db_setup import DB
-from routers.chat_router.router import router as chat_router
+from routers.admin_router.router import router as admin_router
+from routers.batch_router.router import router as batch_router, batch_agent
+from routers.chat_router.router import router as chat_router, agent
+from routers.chat_router.services import drainer
 from routers.user_router.router import router as user_router
 from routers.main_page_router.router import router as main_page_router
+from settings import settings
+from tracing.middleware import TracingMiddleware
+from tracing.tracer_setup import tracer
+from usage.usage_setup import usage_ledger
 
 app: FastAPI = FastAPI()
+app.add_middleware(TracingMiddleware, tracer=tracer)
 
 app.include_router(router=chat_router, tags=["Chat Router"])
 app.include_router(router=user_router, tags=["User Router"])
 app.include_router(router=main_page_router, tags=["Main Page"])
+app.include_router(router=batch_router, tags=["Batch Router"])
+app.include_router(router=admin_router, tags=["Admin Router"])
 
 
 @app.on_event("startup")
 async def startup() -> None:
     await DB.init_orm()
+    await migrate_legacy_messages()
+    usage_ledger.start()
+    drainer.install_signal_handlers(timeout=settings.DRAIN_TIMEOUT_SECONDS)
+    if settings.LLM_WARMUP_ENABLED:
+        await agent.warm_up()
 
 
 @app.on_event("shutdown")
 async def shutdown() -> None:
+    await drainer.drain(timeout=settings.DRAIN_TIMEOUT_SECONDS)
+    await usage_ledger.stop()
     await DB.close_orm()
+    await close_http_client()
+    await batch_agent.aclose()
+    tracer.shutdown()
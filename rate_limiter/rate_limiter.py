@@ -0,0 +1,214 @@
+import math
+import time
+from abc import ABC, abstractmethod
+from typing import Dict, Tuple
+
+
+class RateLimitStore(ABC):
+    """
+    Storage backend for token buckets.
+    """
+
+    @abstractmethod
+    async def take(
+        self,
+        *,
+        key: str,
+        capacity: float,
+        refill_rate: float,
+        amount: float,
+        force: bool = False,
+    ) -> bool:
+        """
+        Refill the bucket stored under `key` and try to take `amount` tokens from it.
+
+        Args:
+            key (str): The bucket key.
+            capacity (float): The maximum number of tokens in the bucket.
+            refill_rate (float): The number of tokens added per second.
+            amount (float): The number of tokens to take.
+            force (bool): Take the tokens even if the bucket goes negative.
+
+        Returns:
+            bool: True if the tokens were taken, otherwise False.
+        """
+
+
+class InMemoryRateLimitStore(RateLimitStore):
+    """
+    Process-local token bucket store. Each worker enforces its own limits.
+
+    Buckets that have refilled completely behave exactly like missing ones, so they are
+    evicted every `sweep_interval` seconds to keep the store bounded by the active keys.
+    """
+
+    def __init__(self, sweep_interval: float = 60.0) -> None:
+        # key -> (tokens, updated_at, capacity, refill_rate)
+        self._buckets: Dict[str, Tuple[float, float, float, float]] = {}
+        self._sweep_interval = sweep_interval
+        self._swept_at = time.monotonic()
+
+    async def take(
+        self,
+        *,
+        key: str,
+        capacity: float,
+        refill_rate: float,
+        amount: float,
+        force: bool = False,
+    ) -> bool:
+        now = time.monotonic()
+        if now - self._swept_at >= self._sweep_interval:
+            self._sweep(now)
+
+        tokens, updated_at, _, _ = self._buckets.get(key, (capacity, now, capacity, refill_rate))
+        tokens = min(capacity, tokens + (now - updated_at) * refill_rate)
+
+        allowed = force or tokens >= amount
+        if allowed:
+            tokens -= amount
+        self._buckets[key] = (tokens, now, capacity, refill_rate)
+        return allowed
+
+    def _sweep(self, now: float) -> None:
+        """
+        Drop the buckets that are full again.
+        """
+        self._buckets = {
+            key: bucket
+            for key, bucket in self._buckets.items()
+            if bucket[0] + (now - bucket[1]) * bucket[3] < bucket[2]
+        }
+        self._swept_at = now
+
+
+class RedisRateLimitStore(RateLimitStore):
+    """
+    Token bucket store shared by all workers through Redis.
+    """
+
+    _TAKE_SCRIPT = """
+        local capacity = tonumber(ARGV[1])
+        local refill_rate = tonumber(ARGV[2])
+        local amount = tonumber(ARGV[3])
+        local now = tonumber(ARGV[4])
+        local force = tonumber(ARGV[5])
+        local state = redis.call('HMGET', KEYS[1], 'tokens', 'updated_at')
+        local tokens = tonumber(state[1]) or capacity
+        local updated_at = tonumber(state[2]) or now
+        tokens = math.min(capacity, tokens + math.max(0, now - updated_at) * refill_rate)
+        local allowed = 0
+        if force == 1 or tokens >= amount then
+            tokens = tokens - amount
+            allowed = 1
+        end
+        redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'updated_at', tostring(now))
+        redis.call('EXPIRE', KEYS[1], tonumber(ARGV[6]))
+        return allowed
+    """
+
+    def __init__(self, url: str) -> None:
+        """
+        Connect to Redis.
+
+        Args:
+            url (str): The Redis connection URL.
+
+        Raises:
+            RuntimeError: If the `redis` package (the `redis` extra) is not installed.
+        """
+        try:
+            from redis.asyncio import Redis
+        except ImportError as ex:
+            raise RuntimeError(
+                "The shared rate limit store needs the redis extra: poetry install -E redis"
+            ) from ex
+
+        self._redis = Redis.from_url(url)
+        self._take = self._redis.register_script(self._TAKE_SCRIPT)
+
+    async def take(
+        self,
+        *,
+        key: str,
+        capacity: float,
+        refill_rate: float,
+        amount: float,
+        force: bool = False,
+    ) -> bool:
+        ttl = math.ceil(capacity / refill_rate) + 1
+        allowed = await self._take(
+            keys=[key],
+            args=[capacity, refill_rate, amount, time.time(), int(force), ttl],
+        )
+        return bool(allowed)
+
+
+class RateLimiter:
+    """
+    Token bucket rate limiter keyed by an arbitrary identifier (usually the username).
+    """
+
+    def __init__(self, *, name: str, store: RateLimitStore, capacity: int, period_seconds: int) -> None:
+        """
+        Initialize the limiter.
+
+        Args:
+            name (str): The namespace of the limiter keys in the store.
+            store (RateLimitStore): The backend holding the buckets.
+            capacity (int): The number of tokens available per period.
+            period_seconds (int): The period in which a drained bucket is refilled.
+        """
+        self.name = name
+        self.store = store
+        self.capacity = float(capacity)
+        self.refill_rate = capacity / period_seconds
+
+    async def acquire(self, key: str, amount: float = 1) -> bool:
+        """
+        Take tokens from the bucket if enough are available.
+
+        Args:
+            key (str): The bucket owner.
+            amount (float): The number of tokens to take.
+
+        Returns:
+            bool: True if the request is within the limit, otherwise False.
+        """
+        return await self.store.take(
+            key=f"{self.name}:{key}",
+            capacity=self.capacity,
+            refill_rate=self.refill_rate,
+            amount=amount,
+        )
+
+    async def charge(self, key: str, amount: float) -> None:
+        """
+        Take tokens unconditionally, letting the bucket go into debt. Used when the
+        real cost is only known after the work is done.
+
+        Args:
+            key (str): The bucket owner.
+            amount (float): The number of tokens to take.
+        """
+        if amount > 0:
+            await self.store.take(
+                key=f"{self.name}:{key}",
+                capacity=self.capacity,
+                refill_rate=self.refill_rate,
+                amount=amount,
+                force=True,
+            )
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Roughly estimate the number of LLM tokens in a text (about four characters per token).
+
+    Args:
+        text (str): The text to measure.
+
+    Returns:
+        int: The estimated number of tokens.
+    """
+    return max(1, len(text) // 4)
@@ -0,0 +1,44 @@
+from rate_limiter.rate_limiter import (
+    RateLimiter,
+    RateLimitStore,
+    InMemoryRateLimitStore,
+    RedisRateLimitStore,
+)
+from settings import settings
+
+
+store: RateLimitStore = (
+    RedisRateLimitStore(url=settings.RATE_LIMIT_REDIS_URL)
+    if settings.RATE_LIMIT_REDIS_URL
+    else InMemoryRateLimitStore()
+)
+
+message_limiter = RateLimiter(
+    name="messages",
+    store=store,
+    capacity=settings.RATE_LIMIT_MESSAGES_PER_MINUTE,
+    period_seconds=60,
+)
+
+llm_token_limiter = RateLimiter(
+    name="llm_tokens",
+    store=store,
+    capacity=settings.RATE_LIMIT_LLM_TOKENS_PER_HOUR,
+    period_seconds=3600,
+)
+
+# Keyed by (client IP, username), so nobody can lock an account out from another address.
+signin_limiter = RateLimiter(
+    name="signin",
+    store=store,
+    capacity=settings.RATE_LIMIT_SIGNIN_ATTEMPTS_PER_MINUTE,
+    period_seconds=60,
+)
+
+# Keyed by client IP, against credential stuffing across many usernames.
+signin_ip_limiter = RateLimiter(
+    name="signin_ip",
+    store=store,
+    capacity=settings.RATE_LIMIT_SIGNIN_ATTEMPTS_PER_IP_PER_MINUTE,
+    period_seconds=60,
+)
@@ -0,0 +1,82 @@
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+
+from fastapi import APIRouter, Request, HTTPException, status
+from fastapi.responses import PlainTextResponse
+
+from db.db_repository import get_usage_rollups
+from logger.logger import logger
+from routers.services import get_current_admin
+from settings import settings
+from tracing.profiler import profile_cpu
+from usage.usage_setup import usage_ledger
+
+router = APIRouter(prefix="/admin")
+
+
+@router.get("/profile", response_class=PlainTextResponse)
+async def cpu_profile(request: Request, seconds: float = 10, interval_ms: float = 10) -> PlainTextResponse:
+    """
+    Capture a sampling CPU profile of this worker for the given number of seconds.
+
+    Args:
+        request (Request): The request object, which includes cookies for authentication.
+        seconds (float): How long to sample, capped at `PROFILE_MAX_SECONDS`.
+        interval_ms (float): Milliseconds between samples.
+
+    Returns:
+        PlainTextResponse: The profile in collapsed stack format, ready for flamegraph.pl or speedscope.
+
+    Raises:
+        HTTPException: If the user is not an admin, the parameters are invalid or a profile is already running.
+    """
+    admin = await get_current_admin(request)
+    if not 0 < seconds <= settings.PROFILE_MAX_SECONDS or interval_ms < 1:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"seconds must be in (0, {settings.PROFILE_MAX_SECONDS}] and interval_ms at least 1",
+        )
+
+    logger.info(f"CPU profile for {seconds}s started by admin {admin.username}")
+    try:
+        profile: str = await profile_cpu(seconds=seconds, interval=interval_ms / 1000)
+    except RuntimeError as ex:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(ex))
+    return PlainTextResponse(profile)
+
+
+@router.get("/usage")
+async def usage(request: Request, hours: int = 24, username: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    Return LLM usage per user and time bucket.
+
+    Args:
+        request (Request): The request object, which includes cookies for authentication.
+        hours (int): How many hours back to report.
+        username (Optional[str]): Restrict the report to this user.
+
+    Returns:
+        List[Dict[str, Any]]: The usage rollups, newest bucket first, with the average reply latency.
+
+    Raises:
+        HTTPException: If the user is not an admin.
+    """
+    await get_current_admin(request)
+    # Make the report include replies that are still in the in-memory counters.
+    await usage_ledger.flush()
+
+    rollups: List[Dict[str, Any]] = await get_usage_rollups(
+        since=datetime.now(timezone.utc) - timedelta(hours=hours),
+        username=username,
+    )
+    return [
+        {
+            "username": rollup["username"],
+            "bucket_start": rollup["bucket_start"].isoformat(),
+            "prompt_tokens": rollup["prompt_tokens"],
+            "completion_tokens": rollup["completion_tokens"],
+            "replies": rollup["replies"],
+            "avg_latency_ms": rollup["total_latency_ms"] / rollup["replies"] if rollup["replies"] else 0.0,
+        }
+        for rollup in rollups
+    ]
@@ -0,0 +1,179 @@
+import asyncio
+import json
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from starlette.datastructures import UploadFile
+from starlette.types import Receive, Scope, Send
+
+import httpx
+from fastapi import APIRouter, Request, HTTPException, status
+from fastapi.responses import StreamingResponse
+
+from agent.main_agent import MainAgent
+from logger.logger import logger
+from routers.batch_router.services import parse_batch_line
+from routers.services import get_current_batch_user
+from settings import settings
+
+router = APIRouter()
+
+# Room for the multipart boundaries and headers around the uploaded file.
+MULTIPART_OVERHEAD_BYTES: int = 16 * 1024
+
+# Batch jobs get their own agent and connection pool, so they never queue behind
+# (or in front of) interactive chat requests.
+batch_agent = MainAgent(
+    limits=httpx.Limits(
+        max_connections=settings.BATCH_MAX_PARALLELISM,
+        max_keepalive_connections=settings.BATCH_MAX_PARALLELISM,
+    )
+)
+batch_lane = asyncio.Semaphore(settings.BATCH_MAX_CONCURRENT_JOBS)
+
+
+class BatchResponse(StreamingResponse):
+    """
+    Streaming response that owns a batch lane slot and releases it however the response ends,
+    including when the client disconnects before the stream starts.
+
+    The stream is closed first, so the slot is free only once the job's model calls have stopped.
+    """
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            try:
+                await self.body_iterator.aclose()
+            finally:
+                batch_lane.release()
+
+
+async def run_batch(
+    *,
+    lines: List[str],
+    parallelism: int,
+    user_id: int,
+) -> AsyncIterator[str]:
+    """
+    Run every conversation of a batch through the agent and stream the results as NDJSON.
+
+    Args:
+        lines (List[str]): The non-empty lines of the uploaded JSONL file.
+        parallelism (int): The maximum number of conversations processed at once.
+        user_id (int): The user the token usage is accounted to.
+
+    Yields:
+        str: One JSON line per conversation in completion order, followed by a summary line.
+    """
+    total: int = len(lines)
+    completed: int = 0
+    failed: int = 0
+
+    ids: List[Any] = []
+    chat_histories: List[List[Tuple[str, str]]] = []
+    for line_number, line in enumerate(lines, start=1):
+        try:
+            conversation_id, chat_history = parse_batch_line(line)
+        except ValueError as ex:
+            completed += 1
+            failed += 1
+            yield json.dumps({
+                "line": line_number,
+                "error": str(ex),
+                "completed": completed,
+                "total": total,
+            }) + "\n"
+            continue
+        ids.append(conversation_id)
+        chat_histories.append(chat_history)
+
+    replies = batch_agent.generate_batch(
+        chat_histories=chat_histories,
+        max_concurrency=parallelism,
+        user_id=user_id,
+    )
+    try:
+        async for index, result in replies:
+            completed += 1
+            item: Dict[str, Any] = {"id": ids[index], "completed": completed, "total": total}
+            if isinstance(result, Exception):
+                failed += 1
+                item["error"] = str(result)
+            else:
+                item["content"] = result
+            yield json.dumps(item) + "\n"
+    finally:
+        # Closing the replies cancels the model calls still running when the stream is closed early.
+        await replies.aclose()
+
+    yield json.dumps({"done": True, "completed": completed, "failed": failed, "total": total}) + "\n"
+
+
+@router.post("/batch")
+async def create_batch(
+    request: Request,
+    parallelism: Optional[int] = None,
+) -> StreamingResponse:
+    """
+    Run an uploaded JSONL file of conversations through the agent and stream the replies as NDJSON.
+
+    The JSONL file is sent in the `file` field of a multipart form, one `{"id": ..., "messages": [...]}`
+    conversation per line. The form is parsed only after the user and the declared body size are checked,
+    so unauthorized or oversized uploads are refused before anything is read.
+
+    Args:
+        request (Request): The request object, which includes cookies for authentication.
+        parallelism (Optional[int]): The number of conversations processed at once,
+                                     capped at `BATCH_MAX_PARALLELISM`.
+
+    Returns:
+        StreamingResponse: The NDJSON stream of replies with progress counters.
+
+    Raises:
+        HTTPException: If the user may not run batch jobs, the file is missing, too large or invalid,
+                       or all batch slots are busy.
+    """
+    current_user = await get_current_batch_user(request)
+
+    if batch_lane.locked():
+        raise HTTPException(status_code=status.HTTP_429_TOO_MANY_REQUESTS, detail="All batch slots are busy")
+
+    too_large = HTTPException(
+        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        detail=f"Batch file is larger than {settings.BATCH_MAX_UPLOAD_BYTES} bytes",
+    )
+    try:
+        content_length: int = int(request.headers["content-length"])
+    except (KeyError, ValueError):
+        raise HTTPException(status_code=status.HTTP_411_LENGTH_REQUIRED, detail="Content-Length is required")
+    if content_length > settings.BATCH_MAX_UPLOAD_BYTES + MULTIPART_OVERHEAD_BYTES:
+        raise too_large
+
+    form = await request.form(max_files=1, max_fields=1)
+    try:
+        file = form.get("file")
+        if not isinstance(file, UploadFile):
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Batch file is required")
+        raw_content: bytes = await file.read(settings.BATCH_MAX_UPLOAD_BYTES + 1)
+    finally:
+        await form.close()
+    if len(raw_content) > settings.BATCH_MAX_UPLOAD_BYTES:
+        raise too_large
+    try:
+        content: str = raw_content.decode("utf-8")
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Batch file must be UTF-8 JSONL")
+    lines: List[str] = [line for line in content.splitlines() if line.strip()]
+    parallelism = max(1, min(parallelism or settings.BATCH_MAX_PARALLELISM, settings.BATCH_MAX_PARALLELISM))
+
+    # Check and take the slot with nothing awaited in between, so a busy lane always answers 429.
+    if batch_lane.locked():
+        raise HTTPException(status_code=status.HTTP_429_TOO_MANY_REQUESTS, detail="All batch slots are busy")
+    await batch_lane.acquire()
+    logger.info(f"Batch of {len(lines)} conversations started by user {current_user.username}")
+
+    return BatchResponse(
+        run_batch(lines=lines, parallelism=parallelism, user_id=current_user.id),
+        media_type="application/x-ndjson",
+    )
@@ -0,0 +1,36 @@
+import json
+from typing import Any, Dict, List, Tuple
+
+from agent.main_agent import MainAgent
+
+
+def parse_batch_line(line: str) -> Tuple[Any, List[Tuple[str, str]]]:
+    """
+    Parse one line of a batch JSONL file into a conversation id and its chat history.
+
+    Each line must be an object like
+    `{"id": "q1", "messages": [{"role": "User", "content": "Hello"}]}`.
+
+    Args:
+        line (str): The JSON line.
+
+    Returns:
+        Tuple[Any, List[Tuple[str, str]]]: The conversation id and its (role, content) history.
+
+    Raises:
+        ValueError: If the line is not valid JSON or does not match the expected format.
+    """
+    try:
+        item: Dict[str, Any] = json.loads(line)
+        chat_history: List[Tuple[str, str]] = [
+            (message["role"], message["content"])
+            for message in item["messages"]
+        ]
+    except (json.JSONDecodeError, KeyError, TypeError) as ex:
+        raise ValueError(f"Invalid batch line: {ex}")
+
+    if not chat_history:
+        raise ValueError("Conversation has no messages")
+    # Validate roles up front so a bad line is reported without reaching the model.
+    MainAgent.messages_to_prompt(chat_history)
+    return item.get("id"), chat_history
@@ -12,9 +12,23 @@ from fastapi import (
 from fastapi.responses import HTMLResponse, RedirectResponse
 from fastapi.templating import Jinja2Templates
 from agent.main_agent import MainAgent
-from db.db_repository import get_user, get_chat_history, save_message_to_db
+from db.db_models import ConversationModel
+from db.db_setup import DB
+from db.db_repository import (
+    get_user,
+    get_conversation,
+    get_conversations,
+    create_conversation,
+    get_chat_history,
+    get_messages_after,
+    save_message_to_db,
+)
 from logger.logger import logger
+from rate_limiter.rate_limiter import estimate_tokens
+from rate_limiter.rate_limiter_setup import message_limiter, llm_token_limiter
+from routers.chat_router.services import ChatSession, history_cache, drainer, decode_resume_token
 from routers.services import validation_token_from_cookie, get_token_from_cookie_ws, get_current_user
+from tracing.tracer_setup import tracer
 
 router = APIRouter()
 agent = MainAgent()
@@ -24,12 +38,13 @@ user_connections: Dict[str, WebSocket] = {}
 
 
 @router.get("/chat", response_class=Response)
-async def chat_page(request: Request) -> Response:
+async def chat_page(request: Request, conversation_id: Optional[int] = None) -> Response:
     """
-    Render the chat page with chat history for an authenticated user.
+    Render the chat page with the conversation list and the active conversation history.
 
     Args:
         request (Request): The request object.
+        conversation_id (Optional[int]): The conversation to open. A new one is started if omitted.
 
     Returns:
         HTMLResponse: The rendered HTML page with chat history.
@@ -46,18 +61,28 @@ async def chat_page(request: Request) -> Response:
             return username
 
         user = await get_user(username=username)
-        messages = await get_chat_history(user=user)
-        message_data: List[Dict[str, Any]] = [
-            {
-                "content": message.content,
-                "role": message.role,
-                "created_at": message.created_at.strftime("%Y-%m-%d %H:%M:%S"),
-            }
-            for message in messages
-        ]
+        conversations: List[ConversationModel] = await get_conversations(user=user)
+
+        message_data: List[Dict[str, Any]] = []
+        if conversation_id is not None:
+            conversation = await get_conversation(user=user, conversation_id=conversation_id)
+            if not conversation:
+                return RedirectResponse(url="/chat")
+            messages = await get_chat_history(user=user, conversation=conversation)
+            message_data = [
+                {
+                    "content": message.content,
+                    "role": message.role,
+                    "created_at": message.created_at.strftime("%Y-%m-%d %H:%M:%S"),
+                }
+                for message in messages
+            ]
+
         return templates.TemplateResponse("chat.html", {
             "request": request,
             "username": username,
+            "conversations": conversations,
+            "conversation_id": conversation_id,
             "messages": message_data
         })
     except Exception as ex:
@@ -65,11 +90,171 @@ async def chat_page(request: Request) -> Response:
         raise HTTPException(status_code=500)
 
 
+async def generate_reply(
+    *,
+    session: ChatSession,
+    conversation: ConversationModel,
+    chat_history: List[Tuple[str, str]],
+    missed: bool = False,
+) -> None:
+    """
+    Generate the agent reply to the cached conversation history, save it and send it to the client.
+
+    Args:
+        session (ChatSession): The chat session to reply to.
+        conversation (ConversationModel): The active conversation.
+        chat_history (List[Tuple[str, str]]): The cached history, ending with the user message.
+        missed (bool): True if the reply answers a message sent before the client reconnected.
+    """
+    current_user = session.user
+    llm_response: str = await agent.generate_response(
+        chat_history=chat_history,
+        user_id=current_user.id,
+    )
+
+    # The real cost is known only now; one token was already reserved when the message was accepted.
+    await llm_token_limiter.charge(
+        current_user.username,
+        sum(estimate_tokens(content) for _, content in chat_history)
+        + estimate_tokens(llm_response) - 1,
+    )
+
+    llm_message = {"content": llm_response, "role": "Agent"}
+    saved_message = await save_message_to_db(user=current_user, conversation=conversation, message=llm_message)
+    chat_history.append((llm_message["role"], llm_message["content"]))
+
+    reply: Dict[str, Any] = {"conversation_id": conversation.id, **llm_message}
+    if missed:
+        reply["missed"] = True
+    await session.websocket.send_text(json.dumps(reply))
+    session.remember(message_id=saved_message.id, role=llm_message["role"])
+
+
+async def process_message(*, session: ChatSession, json_user_message: str) -> None:
+    """
+    Handle one user message: enforce rate limits, save it to its conversation and reply.
+
+    Args:
+        session (ChatSession): The chat session the message came from.
+        json_user_message (str): The raw JSON frame sent by the client.
+    """
+    current_user = session.user
+    websocket = session.websocket
+    logger.info(f"Message accepted from user {current_user.username}")
+
+    if not await message_limiter.acquire(current_user.username):
+        logger.error(f"Message rate limit exceeded for user {current_user.username}")
+        await websocket.send_text(json.dumps({"error": "Too many messages, please slow down"}))
+        return
+
+    if not await llm_token_limiter.acquire(current_user.username):
+        logger.error(f"LLM token rate limit exceeded for user {current_user.username}")
+        await websocket.send_text(json.dumps({"error": "LLM usage limit reached, please try later"}))
+        return
+
+    user_message: Dict[str, Any] = json.loads(json_user_message)
+    conversation_id: Optional[int] = user_message.pop("conversation_id", None)
+
+    if conversation_id is None:
+        conversation: ConversationModel = await create_conversation(
+            user=current_user, title=user_message["content"][:100]
+        )
+        # Tell the client the new id right away, so its next messages join this conversation.
+        await websocket.send_text(json.dumps({"type": "conversation", "conversation_id": conversation.id}))
+        chat_history: List[Tuple[str, str]] = history_cache.activate(
+            user=current_user, conversation=conversation
+        )
+    else:
+        try:
+            conversation_id = int(conversation_id)
+        except (TypeError, ValueError):
+            logger.error(f"Invalid conversation id {conversation_id!r} from user {current_user.username}")
+            await websocket.send_text(json.dumps({"error": "Invalid conversation id"}))
+            return
+        active = await history_cache.load(user=current_user, conversation_id=conversation_id)
+        if not active:
+            logger.error(f"Conversation {conversation_id} not found for user {current_user.username}")
+            await websocket.send_text(json.dumps({"error": "Conversation not found"}))
+            return
+        conversation, chat_history = active
+
+    saved_message = await save_message_to_db(user=current_user, conversation=conversation, message=user_message)
+    chat_history.append((user_message["role"], user_message["content"]))
+    session.conversation_id = conversation.id
+    session.remember(message_id=saved_message.id, role=user_message["role"])
+
+    await generate_reply(session=session, conversation=conversation, chat_history=chat_history)
+
+
+async def resume_session(*, session: ChatSession, resume_token: str) -> None:
+    """
+    Send a reconnecting client only the messages it missed, and answer its last message
+    if the previous worker stopped before replying.
+
+    Args:
+        session (ChatSession): The new chat session.
+        resume_token (str): The token received in the "reconnect" frame.
+    """
+    current_user = session.user
+    payload = decode_resume_token(token=resume_token, username=current_user.username)
+    if not payload or payload.get("conversation_id") is None:
+        return
+    # The previous worker wrote for this user just before the handover, which this worker's
+    # read-your-writes window does not know about: keep the whole resume on the primary.
+    DB.mark_write(current_user.username)
+
+    conversation: Optional[ConversationModel] = await get_conversation(
+        user=current_user, conversation_id=payload["conversation_id"]
+    )
+    if not conversation:
+        return
+    session.conversation_id = conversation.id
+    session.last_message_id = payload.get("last_message_id")
+    session.last_role = payload.get("last_role")
+
+    if session.last_message_id is not None:
+        missed = await get_messages_after(
+            user=current_user, conversation=conversation, message_id=session.last_message_id
+        )
+        for message in missed:
+            await session.websocket.send_text(json.dumps({
+                "conversation_id": conversation.id,
+                "content": message.content,
+                "role": message.role,
+                "missed": True,
+            }))
+            session.remember(message_id=message.id, role=message.role)
+        logger.info(f"User {current_user.username} resumed conversation {conversation.id}, {len(missed)} missed messages")
+
+        # The missed messages are read from the primary after the previous worker's turn was stopped,
+        # so a reply it managed to save shows up here and is not generated twice.
+        if payload.get("pending_reply") and (session.last_role or "").lower() == "user":
+            active = await history_cache.load(user=current_user, conversation_id=conversation.id)
+            if active:
+                await generate_reply(
+                    session=session, conversation=active[0], chat_history=active[1], missed=True
+                )
+
+
+async def chat_turn(*, session: ChatSession, json_user_message: str) -> None:
+    """
+    Process one user message inside a "chat.turn" span.
+
+    Args:
+        session (ChatSession): The chat session the message came from.
+        json_user_message (str): The raw JSON frame sent by the client.
+    """
+    with tracer.span("chat.turn", username=session.user.username):
+        await process_message(session=session, json_user_message=json_user_message)
+
+
 @router.websocket("/ws")
 async def websocket_endpoint(websocket: WebSocket) -> None:
     """
     Handle WebSocket connections for real-time chat.
 
+    A client reconnecting after a drain sends `{"type": "resume", "resume_token": ...}` as its first frame.
+
     Args:
         websocket (WebSocket): The WebSocket connection object.
 
@@ -77,6 +262,10 @@ async def websocket_endpoint(websocket: WebSocket) -> None:
         HTTPException: If the user is not authenticated.
     """
     try:
+        if drainer.draining:
+            await websocket.close(code=1013)
+            return
+
         cookies: Dict[bytes, bytes] = dict(websocket.scope.get("headers", []))
         token: Optional[str] = await get_token_from_cookie_ws(cookies)
         if not token:
@@ -86,35 +275,32 @@ async def websocket_endpoint(websocket: WebSocket) -> None:
                 headers={"WWW-Authenticate": "Bearer"},
             )
 
-        current_user = await get_current_user(token=token)
+        with tracer.span("ws.connect"):
+            current_user = await get_current_user(token=token)
         await websocket.accept()
 
         user_connections[current_user.username] = websocket
+        session = ChatSession(websocket=websocket, user=current_user)
+        drainer.register(session)
         try:
-            while True:
+            while not drainer.draining:
                 json_user_message: str = await websocket.receive_text()
-                logger.info(f"Message accepted from user {current_user.username}")
-
-                user_message: Dict[str, str] = json.loads(json_user_message)
-
-                await save_message_to_db(user=current_user, message=user_message)
-
-                chat_history: List[Tuple[str, str]] = [
-                    (item.role, item.content)
-                    for item in await get_chat_history(user=current_user)
-                ]
-
-                llm_response: str = await agent.generate_response(
-                    chat_history=chat_history
-                )
-
-                llm_message = {"content": llm_response, "role": "Agent"}
-                await save_message_to_db(user=current_user, message=llm_message)
-
-                await websocket.send_text(llm_response)
+                if drainer.draining:
+                    # Arrived after the drain started: the client sends it again after reconnecting.
+                    break
+                frame: Dict[str, Any] = json.loads(json_user_message)
+                if frame.get("type") == "resume":
+                    resume_token: str = frame.get("resume_token") or ""
+                    await session.run_turn(resume_session(session=session, resume_token=resume_token))
+                    continue
+                await session.run_turn(chat_turn(session=session, json_user_message=json_user_message))
 
+            await drainer.send_reconnect(session)
         except WebSocketDisconnect:
             user_connections.pop(current_user.username, None)
+            history_cache.evict(username=current_user.username)
+        finally:
+            drainer.unregister(session)
     except Exception as ex:
         logger.error(f"An error occurred in websocket method: {ex}")
         raise HTTPException(status_code=500)
@@ -0,0 +1,327 @@
+import asyncio
+import json
+import random
+import signal
+from datetime import timedelta
+from typing import Any, Callable, Coroutine, Dict, List, Optional, Set, Tuple
+
+import jwt
+from fastapi import WebSocket
+
+from db.db_models import UserModel, ConversationModel
+from db.db_repository import get_conversation, get_chat_history
+from logger.logger import logger
+from routers.user_router.services import create_access_token
+from settings import settings
+
+RESUME_TOKEN_AUDIENCE: str = "chat-resume"
+
+
+class ActiveConversationCache:
+    """
+    In-memory cache holding the history of each user's active conversation only.
+
+    Switching to another conversation evicts the previous one, so memory and
+    prompt size stay bounded by a single thread per user.
+    """
+
+    def __init__(self) -> None:
+        self._entries: Dict[str, Tuple[ConversationModel, List[Tuple[str, str]]]] = {}
+
+    async def load(
+        self,
+        *,
+        user: UserModel,
+        conversation_id: int,
+    ) -> Optional[Tuple[ConversationModel, List[Tuple[str, str]]]]:
+        """
+        Return the conversation and its history, loading it from the database on a cache miss.
+
+        Args:
+            user (UserModel): The owner of the conversation.
+            conversation_id (int): The id of the conversation to activate.
+
+        Returns:
+            Optional[Tuple[ConversationModel, List[Tuple[str, str]]]]: The conversation and its
+                (role, content) history, or None if the user does not own such a conversation.
+        """
+        entry = self._entries.get(user.username)
+        if entry and entry[0].id == conversation_id:
+            return entry
+
+        conversation: Optional[ConversationModel] = await get_conversation(
+            user=user, conversation_id=conversation_id
+        )
+        if not conversation:
+            return None
+
+        history: List[Tuple[str, str]] = [
+            (item.role, item.content)
+            for item in await get_chat_history(user=user, conversation=conversation)
+        ]
+        self._entries[user.username] = (conversation, history)
+        return self._entries[user.username]
+
+    def activate(self, *, user: UserModel, conversation: ConversationModel) -> List[Tuple[str, str]]:
+        """
+        Make a freshly created conversation the active one with an empty history.
+
+        Args:
+            user (UserModel): The owner of the conversation.
+            conversation (ConversationModel): The new conversation.
+
+        Returns:
+            List[Tuple[str, str]]: The (empty) cached history of the conversation.
+        """
+        self._entries[user.username] = (conversation, [])
+        return self._entries[user.username][1]
+
+    def evict(self, *, username: str) -> None:
+        """
+        Drop the cached conversation of a user.
+
+        Args:
+            username (str): The user whose cache entry is removed.
+        """
+        self._entries.pop(username, None)
+
+
+history_cache = ActiveConversationCache()
+
+
+class ChatSession:
+    """
+    State of a single chat WebSocket connection, used to drain and resume it.
+    """
+
+    def __init__(self, *, websocket: WebSocket, user: UserModel) -> None:
+        self.websocket = websocket
+        self.user = user
+        self.conversation_id: Optional[int] = None
+        self.last_message_id: Optional[int] = None
+        self.last_role: Optional[str] = None
+        # Set while the session waits for the next message, cleared while a reply is generated.
+        self.idle = asyncio.Event()
+        self.idle.set()
+        self.turn_task: Optional[asyncio.Task] = None
+        self.pending_reply: bool = False
+        self.reconnect_sent: bool = False
+
+    def remember(self, *, message_id: int, role: str) -> None:
+        """
+        Record the last message the client has received, so a resumed session sends only newer ones.
+
+        Args:
+            message_id (int): The id of the message.
+            role (str): The role of the message author.
+        """
+        self.last_message_id = message_id
+        self.last_role = role
+
+    async def run_turn(self, turn: Coroutine[Any, Any, None]) -> None:
+        """
+        Run one turn of the conversation as a task, so the drainer can cancel it on timeout.
+
+        Args:
+            turn (Coroutine[Any, Any, None]): The coroutine handling the turn.
+
+        Raises:
+            Exception: Any error raised by the turn itself.
+        """
+        self.idle.clear()
+        self.turn_task = asyncio.ensure_future(turn)
+        try:
+            await asyncio.wait({self.turn_task})
+        finally:
+            if not self.turn_task.done():
+                self.turn_task.cancel()
+            self.idle.set()
+        if not self.turn_task.cancelled():
+            self.turn_task.result()
+
+
+def create_resume_token(*, session: ChatSession) -> str:
+    """
+    Create a signed token that lets a client resume its conversation on another worker.
+
+    The token carries its own audience, so it is rejected wherever an access token is expected.
+
+    Args:
+        session (ChatSession): The session being drained.
+
+    Returns:
+        str: The encoded resume token.
+    """
+    return create_access_token(
+        data={
+            "sub": session.user.username,
+            "type": "resume",
+            "aud": RESUME_TOKEN_AUDIENCE,
+            "conversation_id": session.conversation_id,
+            "last_message_id": session.last_message_id,
+            "last_role": session.last_role,
+            "pending_reply": session.pending_reply,
+        },
+        expires_delta=timedelta(minutes=settings.RESUME_TOKEN_EXPIRE_MINUTES),
+    )
+
+
+def decode_resume_token(*, token: str, username: str) -> Optional[Dict[str, Any]]:
+    """
+    Validate a resume token and check that it belongs to the connecting user.
+
+    Args:
+        token (str): The resume token sent by the client.
+        username (str): The username of the authenticated user.
+
+    Returns:
+        Optional[Dict[str, Any]]: The token payload if valid, otherwise None.
+    """
+    try:
+        payload: Dict[str, Any] = jwt.decode(
+            token,
+            settings.AUTH_SECRET_KEY,
+            algorithms=[settings.AUTH_ALGORITHM],
+            audience=RESUME_TOKEN_AUDIENCE,
+        )
+    except jwt.PyJWTError as ex:
+        logger.error(f"Invalid resume token for user {username}: {ex}")
+        return None
+    if payload.get("type") != "resume" or payload.get("sub") != username:
+        logger.error(f"Resume token does not belong to user {username}")
+        return None
+    return payload
+
+
+class ConnectionDrainer:
+    """
+    Drains chat connections before the worker stops.
+
+    Once draining, new sockets are refused, idle sessions get a "reconnect" frame right away
+    and busy sessions get it as soon as their reply is sent. Turns still running when the
+    timeout expires are cancelled and their sessions are told that the reply is pending, so the
+    next worker answers it.
+    Clients reconnect after a random delay to spread the reconnect load.
+    """
+
+    def __init__(self) -> None:
+        self.draining: bool = False
+        self._sessions: Set[ChatSession] = set()
+        self._drain_task: Optional[asyncio.Task] = None
+
+    def register(self, session: ChatSession) -> None:
+        self._sessions.add(session)
+
+    def unregister(self, session: ChatSession) -> None:
+        self._sessions.discard(session)
+
+    async def send_reconnect(self, session: ChatSession) -> None:
+        """
+        Send the "reconnect" frame with a resume token and close the session.
+
+        Args:
+            session (ChatSession): The session to close.
+        """
+        if session.reconnect_sent:
+            return
+        session.reconnect_sent = True
+        self.unregister(session)
+        try:
+            await session.websocket.send_text(json.dumps({
+                "type": "reconnect",
+                "resume_token": create_resume_token(session=session),
+                "pending_reply": session.pending_reply,
+                "retry_after_ms": random.randint(0, int(settings.DRAIN_RECONNECT_JITTER_SECONDS * 1000)),
+            }))
+            await session.websocket.close(code=1012)
+        except Exception as ex:
+            logger.error(f"An error occurred in sending reconnect to user {session.user.username}: {ex}")
+
+    async def drain(self, *, timeout: float) -> None:
+        """
+        Stop accepting sessions, let in-flight replies finish and ask every client to reconnect.
+
+        Args:
+            timeout (float): How long to wait for in-flight replies.
+        """
+        if self.draining:
+            if self._drain_task is not None and self._drain_task is not asyncio.current_task():
+                await asyncio.shield(self._drain_task)
+            return
+        self.draining = True
+        logger.info(f"Draining {len(self._sessions)} chat connections")
+
+        for session in list(self._sessions):
+            if session.idle.is_set():
+                await self.send_reconnect(session)
+
+        busy: List[ChatSession] = [session for session in self._sessions if not session.idle.is_set()]
+        if busy:
+            try:
+                await asyncio.wait_for(
+                    asyncio.gather(*(session.idle.wait() for session in busy)),
+                    timeout=timeout,
+                )
+            except asyncio.TimeoutError:
+                logger.error("Drain timeout expired, cancelling in-flight replies")
+                await self._cancel_turns([session for session in busy if not session.idle.is_set()])
+
+        for session in list(self._sessions):
+            await self.send_reconnect(session)
+        logger.info("Chat connections drained")
+
+    async def _cancel_turns(self, sessions: List[ChatSession]) -> None:
+        """
+        Cancel the running turns and wait for them to stop, so nothing is saved after the resume
+        token hands the conversation over to the next worker.
+
+        Args:
+            sessions (List[ChatSession]): The sessions still generating a reply.
+        """
+        turns: Set[asyncio.Task] = set()
+        for session in sessions:
+            session.pending_reply = True
+            if session.turn_task is not None and not session.turn_task.done():
+                session.turn_task.cancel()
+                turns.add(session.turn_task)
+        if turns:
+            await asyncio.wait(turns)
+
+    def install_signal_handlers(self, *, timeout: float) -> None:
+        """
+        Start draining on SIGTERM/SIGINT and only then hand the signal to the server's own handler.
+
+        The server closes every WebSocket as soon as it starts shutting down, before the
+        application shutdown hook runs, so draining has to happen before the server sees the signal.
+        A second signal during the drain is passed through immediately.
+
+        Args:
+            timeout (float): How long to wait for in-flight replies.
+        """
+        loop = asyncio.get_running_loop()
+
+        async def drain_then_exit(original: Callable, signum: int) -> None:
+            await self.drain(timeout=timeout)
+            original(signum, None)
+
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            original = signal.getsignal(signum)
+            if not callable(original):
+                continue
+
+            def handler(received: int, frame: Any, original: Callable = original) -> None:
+                if self._drain_task is not None:
+                    original(received, frame)
+                    return
+                loop.call_soon_threadsafe(self._start_drain, drain_then_exit(original, received))
+
+            signal.signal(signum, handler)
+
+    def _start_drain(self, coroutine: Any) -> None:
+        if self._drain_task is None:
+            self._drain_task = asyncio.create_task(coroutine)
+        else:
+            coroutine.close()
+
+
+drainer = ConnectionDrainer()
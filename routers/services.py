@@ -1,11 +1,12 @@
 import jwt
 from typing import Dict, Optional, Union
-from fastapi import HTTPException, status
+from fastapi import HTTPException, Request, status
 from fastapi.responses import RedirectResponse
 from db.db_models import UserModel
 from db.db_repository import get_user
 from logger.logger import logger
 from settings import settings
+from tracing.tracer_setup import tracer
 
 
 async def get_token_from_cookie_ws(cookies: Dict[bytes, bytes]) -> str:
@@ -59,13 +60,14 @@ def validation_token_from_cookie(token: Optional[str]) -> Union[str, RedirectRes
             algorithms=[settings.AUTH_ALGORITHM],
         )
         username: Optional[str] = payload.get("sub")
-        if not username:
+        if not username or payload.get("type") == "resume":
             return RedirectResponse(url="/signin?error=Invalid+credentials")
         return username
     except jwt.PyJWTError:
         return RedirectResponse(url="/signin?error=Invalid+token")
 
 
+@tracer.traced("auth.get_current_user")
 async def get_current_user(token: str) -> UserModel:
     """
     Retrieve the current user based on the provided token.
@@ -85,13 +87,15 @@ async def get_current_user(token: str) -> UserModel:
         headers={"WWW-Authenticate": "Bearer"},
     )
     try:
-        payload: dict = jwt.decode(
-            token,
-            settings.AUTH_SECRET_KEY,
-            algorithms=[settings.AUTH_ALGORITHM],
-        )
+        with tracer.span("auth.jwt_decode"):
+            payload: dict = jwt.decode(
+                token,
+                settings.AUTH_SECRET_KEY,
+                algorithms=[settings.AUTH_ALGORITHM],
+            )
         username: Optional[str] = payload.get("sub")
-        if not username:
+        # Resume tokens only resume a chat session; they are never accepted as a login.
+        if not username or payload.get("type") == "resume":
             raise credentials_exception
     except jwt.ExpiredSignatureError:
         raise HTTPException(
@@ -106,3 +110,56 @@ async def get_current_user(token: str) -> UserModel:
         raise credentials_exception
     return user
 
+
+async def get_current_admin(request: Request) -> UserModel:
+    """
+    Retrieve the current user from the request cookie and ensure they are an admin.
+
+    Args:
+        request (Request): The request object, which includes cookies for authentication.
+
+    Returns:
+        UserModel: The authenticated admin user.
+
+    Raises:
+        HTTPException: If the user is not authenticated or not listed in `ADMIN_USERNAMES`.
+    """
+    cookie_header: Optional[str] = request.cookies.get("access_token")
+    if not cookie_header or not cookie_header.startswith("Bearer "):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Not authenticated")
+
+    user: UserModel = await get_current_user(token=cookie_header[len("Bearer "):])
+    admins = {username.strip() for username in settings.ADMIN_USERNAMES.split(",") if username.strip()}
+    if user.username not in admins:
+        logger.error(f"User {user.username} tried to access an admin endpoint")
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin access required")
+    return user
+
+
+async def get_current_batch_user(request: Request) -> UserModel:
+    """
+    Retrieve the current user from the request cookie and ensure they may run batch jobs.
+
+    Args:
+        request (Request): The request object, which includes cookies for authentication.
+
+    Returns:
+        UserModel: The authenticated user listed in `BATCH_USERNAMES` or `ADMIN_USERNAMES`.
+
+    Raises:
+        HTTPException: If the user is not authenticated or not allowed to run batch jobs.
+    """
+    cookie_header: Optional[str] = request.cookies.get("access_token")
+    if not cookie_header or not cookie_header.startswith("Bearer "):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Not authenticated")
+
+    user: UserModel = await get_current_user(token=cookie_header[len("Bearer "):])
+    allowed = {
+        username.strip()
+        for username in f"{settings.BATCH_USERNAMES},{settings.ADMIN_USERNAMES}".split(",")
+        if username.strip()
+    }
+    if user.username not in allowed:
+        logger.error(f"User {user.username} tried to run a batch job")
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Batch access required")
+    return user
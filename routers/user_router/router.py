@@ -4,6 +4,7 @@ from fastapi.templating import Jinja2Templates
 
 from db.db_repository import get_user, create_user
 from logger.logger import logger
+from rate_limiter.rate_limiter_setup import signin_limiter, signin_ip_limiter
 from routers.user_router.services import authenticate_user, create_access_token, get_password_hash
 from settings import settings
 
@@ -68,11 +69,16 @@ async def signin_page(request: Request, error: str = None) -> HTMLResponse:
 
 
 @router.post("/signin", response_class=RedirectResponse)
-async def login_for_access_token(username: str = Form(...), password: str = Form(...)) -> RedirectResponse:
+async def login_for_access_token(
+    request: Request,
+    username: str = Form(...),
+    password: str = Form(...),
+) -> RedirectResponse:
     """
     Authenticate the user and return an access token.
 
     Args:
+        request (Request): The request object, used to rate limit by client IP.
         username (str): The username of the user.
         password (str): The password of the user.
 
@@ -80,6 +86,14 @@ async def login_for_access_token(username: str = Form(...), password: str = Form
         RedirectResponse: A redirect to the chat page with an access token set in the cookie.
     """
     try:
+        client_ip: str = request.client.host if request.client else "unknown"
+        if (
+            not await signin_ip_limiter.acquire(client_ip)
+            or not await signin_limiter.acquire(f"{client_ip}:{username}")
+        ):
+            logger.error(f"Sign in rate limit exceeded for user {username} from {client_ip}")
+            return RedirectResponse(url="/signin?error=Too+many+attempts", status_code=303)
+
         user = await authenticate_user(username=username, password=password)
         if not user:
             logger.error(f"User {username} redirected to sign in page because does not exist")
@@ -1,3 +1,4 @@
+from typing import Optional
 from pydantic import Field
 from pydantic_settings import BaseSettings
 
@@ -38,6 +39,21 @@ class Settings(BaseSettings):
         description="The name of the PostgreSQL database to connect to."
     )
 
+    POSTGRES_REPLICA_DSNS: str = Field(
+        "",
+        description="Comma separated connection strings of read replicas. Reads go to the primary if empty."
+    )
+
+    POSTGRES_READ_YOUR_WRITES_SECONDS: float = Field(
+        5.0,
+        description="How long a user's reads are sent to the primary after that user writes."
+    )
+
+    POSTGRES_REPLICA_HEALTH_CHECK_SECONDS: float = Field(
+        10.0,
+        description="Interval in seconds between read replica health checks."
+    )
+
     ACCESS_TOKEN_EXPIRE_MINUTES: int = Field(
         ...,
         description="Expiration time for access tokens in minutes."
@@ -53,6 +69,11 @@ class Settings(BaseSettings):
         description="The algorithm used for signing authentication tokens."
     )
 
+    ADMIN_USERNAMES: str = Field(
+        "",
+        description="Comma separated usernames allowed to use the admin endpoints."
+    )
+
     LLM_NAME: str = Field(
         ...,
         description="The name of the language model being used (e.g., 'ollama' or 'openai')."
@@ -78,6 +99,127 @@ class Settings(BaseSettings):
         description="The model to be used with Ollama."
     )
 
+    OLLAMA_KEEP_ALIVE: str = Field(
+        "30m",
+        description="How long Ollama keeps the model loaded after a request (e.g. '30m', '3600' or '-1' for forever)."
+    )
+
+    LLM_WARMUP_ENABLED: bool = Field(
+        True,
+        description="Send a tiny request to the model on startup so the first chat turn does not pay for model load."
+    )
+
+    LLM_HTTP_MAX_CONNECTIONS: int = Field(
+        20,
+        description="Maximum number of concurrent HTTP connections to the LLM backend."
+    )
+
+    LLM_HTTP_MAX_KEEPALIVE_CONNECTIONS: int = Field(
+        10,
+        description="Maximum number of idle keep-alive HTTP connections kept open to the LLM backend."
+    )
+
+    LLM_HTTP_KEEPALIVE_EXPIRY: float = Field(
+        120.0,
+        description="Seconds an idle keep-alive connection to the LLM backend is kept open."
+    )
+
+    LLM_HTTP_TIMEOUT: float = Field(
+        300.0,
+        description="Timeout in seconds for a single LLM HTTP request."
+    )
+
+    BATCH_MAX_PARALLELISM: int = Field(
+        8,
+        description="Maximum number of conversations of one batch job processed by the LLM at once."
+    )
+
+    BATCH_MAX_CONCURRENT_JOBS: int = Field(
+        2,
+        description="Maximum number of batch jobs running at the same time."
+    )
+
+    BATCH_MAX_UPLOAD_BYTES: int = Field(
+        10 * 1024 * 1024,
+        description="Maximum size in bytes of an uploaded batch file."
+    )
+
+    BATCH_USERNAMES: str = Field(
+        "",
+        description="Comma separated usernames allowed to run batch jobs, in addition to the admins."
+    )
+
+    RATE_LIMIT_MESSAGES_PER_MINUTE: int = Field(
+        20,
+        description="Maximum number of chat messages a user can send per minute."
+    )
+
+    RATE_LIMIT_LLM_TOKENS_PER_HOUR: int = Field(
+        100000,
+        description="Maximum number of LLM tokens (prompt and completion) a user can consume per hour."
+    )
+
+    RATE_LIMIT_SIGNIN_ATTEMPTS_PER_MINUTE: int = Field(
+        5,
+        description="Maximum number of sign in attempts per username from one client IP per minute."
+    )
+
+    RATE_LIMIT_SIGNIN_ATTEMPTS_PER_IP_PER_MINUTE: int = Field(
+        20,
+        description="Maximum number of sign in attempts from one client IP per minute, across all usernames."
+    )
+
+    RATE_LIMIT_REDIS_URL: Optional[str] = Field(
+        None,
+        description="Redis URL for sharing rate limits between workers. Limits are kept in process if not set."
+    )
+
+    USAGE_BUCKET_SECONDS: int = Field(
+        3600,
+        description="Size in seconds of the time buckets LLM usage is aggregated into."
+    )
+
+    USAGE_FLUSH_SECONDS: float = Field(
+        30.0,
+        description="Interval in seconds between flushes of aggregated LLM usage to the database."
+    )
+
+    DRAIN_TIMEOUT_SECONDS: float = Field(
+        8.0,
+        description="How long shutdown waits for in-flight chat replies before cancelling them. "
+                    "Keep it below the container stop grace period."
+    )
+
+    DRAIN_RECONNECT_JITTER_SECONDS: float = Field(
+        5.0,
+        description="Upper bound of the random delay clients wait before reconnecting after a drain."
+    )
+
+    RESUME_TOKEN_EXPIRE_MINUTES: int = Field(
+        10,
+        description="Expiration time for session resume tokens in minutes."
+    )
+
+    TRACE_SAMPLE_RATE: float = Field(
+        0.0,
+        description="Fraction of requests and chat turns to trace, from 0.0 (off) to 1.0 (all)."
+    )
+
+    TRACE_EXPORTER: str = Field(
+        "console",
+        description="Where finished spans are exported: 'console' (application log) or 'file'."
+    )
+
+    TRACE_FILE_PATH: str = Field(
+        "traces.jsonl",
+        description="JSON lines file the 'file' trace exporter appends spans to."
+    )
+
+    PROFILE_MAX_SECONDS: int = Field(
+        60,
+        description="Maximum duration of an on-demand CPU profile."
+    )
+
 
 # Instance of the Settings class, which loads the configuration from the environment.
 settings: Settings = Settings()
@@ -0,0 +1,19 @@
+import os
+
+# The application settings are required environment variables; give the tests harmless values.
+for name, value in {
+    "POSTGRES_HOST": "localhost",
+    "POSTGRES_PORT": "5432",
+    "POSTGRES_USER": "test",
+    "POSTGRES_PASSWORD": "test",
+    "POSTGRES_DB": "test",
+    "ACCESS_TOKEN_EXPIRE_MINUTES": "60",
+    "AUTH_SECRET_KEY": "test-secret-key-of-at-least-32-bytes",
+    "AUTH_ALGORITHM": "HS256",
+    "LLM_NAME": "ollama",
+    "OPENAI_API_KEY": "test",
+    "OPENAI_MODEL": "test",
+    "OLLAMA_URL": "http://localhost:11434",
+    "OLLAMA_MODEL": "test",
+}.items():
+    os.environ.setdefault(name, value)
@@ -0,0 +1,147 @@
+import asyncio
+import json
+
+import pytest
+from fastapi import FastAPI, HTTPException, status
+from fastapi.testclient import TestClient
+from starlette.requests import ClientDisconnect
+
+from routers.batch_router import router as batch_module
+from settings import settings
+
+
+class FakeUser:
+    id = 1
+    username = "analyst"
+
+
+async def allowed_user(request):
+    return FakeUser()
+
+
+async def fake_generate_batch(*, chat_histories, max_concurrency, user_id):
+    for index, chat_history in enumerate(chat_histories):
+        yield index, f"reply to {chat_history[-1][1]}"
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(batch_module, "get_current_batch_user", allowed_user)
+    monkeypatch.setattr(batch_module.batch_agent, "generate_batch", fake_generate_batch)
+    monkeypatch.setattr(batch_module, "batch_lane", asyncio.Semaphore(1))
+    app = FastAPI()
+    app.include_router(batch_module.router)
+    return TestClient(app)
+
+
+def upload(client, content: bytes):
+    return client.post("/batch", files={"file": ("batch.jsonl", content, "application/x-ndjson")})
+
+
+def test_batch_streams_results_and_releases_slot(client):
+    content = b"\n".join([
+        json.dumps({"id": "q1", "messages": [{"role": "User", "content": "hi"}]}).encode(),
+        b"not json",
+    ])
+    response = upload(client, content)
+
+    assert response.status_code == 200
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert lines[0]["line"] == 2 and "error" in lines[0]
+    assert lines[1] == {"id": "q1", "completed": 2, "total": 2, "content": "reply to hi"}
+    assert lines[2] == {"done": True, "completed": 2, "failed": 1, "total": 2}
+    assert not batch_module.batch_lane.locked()
+
+
+def test_busy_lane_answers_429(client):
+    asyncio.run(batch_module.batch_lane.acquire())
+    response = upload(client, b"")
+    assert response.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+
+
+def test_oversized_upload_answers_413(client, monkeypatch):
+    # Settings are frozen, so swap in a copy with a tiny upload limit.
+    monkeypatch.setattr(batch_module, "settings", settings.model_copy(update={"BATCH_MAX_UPLOAD_BYTES": 10}))
+    response = upload(client, b"x" * 11)
+    assert response.status_code == status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+    assert not batch_module.batch_lane.locked()
+
+
+def test_declared_size_is_checked_before_the_body_is_parsed(client, monkeypatch):
+    monkeypatch.setattr(batch_module, "settings", settings.model_copy(update={"BATCH_MAX_UPLOAD_BYTES": 10}))
+    body = b"x" * (10 + batch_module.MULTIPART_OVERHEAD_BYTES + 1)
+    response = client.post("/batch", content=body, headers={"Content-Type": "multipart/form-data; boundary=x"})
+    assert response.status_code == status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+
+
+def test_unauthorized_upload_is_refused_before_the_body_is_parsed(client, monkeypatch):
+    async def anonymous(request):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Not authenticated")
+
+    monkeypatch.setattr(batch_module, "get_current_batch_user", anonymous)
+    response = client.post("/batch", content=b"not a form", headers={"Content-Type": "multipart/form-data; boundary=x"})
+    assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+
+def test_user_outside_allow_list_is_rejected(client, monkeypatch):
+    async def forbidden_user(request):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Batch access required")
+
+    monkeypatch.setattr(batch_module, "get_current_batch_user", forbidden_user)
+    response = upload(client, b"")
+    assert response.status_code == status.HTTP_403_FORBIDDEN
+
+
+def test_slot_is_released_when_the_stream_never_starts(monkeypatch):
+    monkeypatch.setattr(batch_module, "batch_lane", asyncio.Semaphore(1))
+
+    async def never_iterated():
+        raise AssertionError("the stream must not start")
+        yield ""
+
+    async def failing_send(message):
+        raise OSError("client disconnected")
+
+    async def receive():
+        return {"type": "http.disconnect"}
+
+    async def run():
+        await batch_module.batch_lane.acquire()
+        response = batch_module.BatchResponse(never_iterated(), media_type="application/x-ndjson")
+        with pytest.raises(OSError):
+            await response({"type": "http", "asgi": {"spec_version": "2.0"}}, receive, failing_send)
+
+    asyncio.run(run())
+    assert not batch_module.batch_lane.locked()
+
+
+def test_stream_is_closed_before_the_slot_is_released(monkeypatch):
+    monkeypatch.setattr(batch_module, "batch_lane", asyncio.Semaphore(1))
+    events = []
+
+    async def endless():
+        try:
+            while True:
+                yield "line\n"
+        finally:
+            events.append(("closed", batch_module.batch_lane.locked()))
+
+    sent = []
+
+    async def send(message):
+        sent.append(message)
+        if len(sent) > 2:
+            raise OSError("client disconnected")
+
+    async def receive():
+        await asyncio.sleep(10)
+
+    async def run():
+        await batch_module.batch_lane.acquire()
+        response = batch_module.BatchResponse(endless(), media_type="application/x-ndjson")
+        with pytest.raises(ClientDisconnect):
+            await response({"type": "http", "asgi": {"spec_version": "2.4"}}, receive, send)
+
+    asyncio.run(run())
+    assert events == [("closed", True)]
+    assert not batch_module.batch_lane.locked()
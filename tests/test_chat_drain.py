@@ -0,0 +1,127 @@
+import asyncio
+import json
+
+import pytest
+from fastapi import HTTPException
+from fastapi.responses import RedirectResponse
+
+from routers.chat_router.services import (
+    ChatSession,
+    ConnectionDrainer,
+    create_resume_token,
+    decode_resume_token,
+)
+from routers.services import get_current_user, validation_token_from_cookie
+from routers.user_router.services import create_access_token
+
+
+class FakeUser:
+    id = 1
+    username = "alice"
+
+
+class FakeWebSocket:
+    def __init__(self):
+        self.frames = []
+        self.close_code = None
+
+    async def send_text(self, text):
+        self.frames.append(json.loads(text))
+
+    async def close(self, code):
+        self.close_code = code
+
+
+def new_session():
+    session = ChatSession(websocket=FakeWebSocket(), user=FakeUser())
+    session.conversation_id = 7
+    return session
+
+
+def resume_payload(session):
+    frame = session.websocket.frames[-1]
+    assert frame["type"] == "reconnect"
+    return decode_resume_token(token=frame["resume_token"], username="alice")
+
+
+def test_idle_session_is_told_to_reconnect_without_pending_reply():
+    drainer = ConnectionDrainer()
+    session = new_session()
+    session.remember(message_id=3, role="Agent")
+    drainer.register(session)
+
+    asyncio.run(drainer.drain(timeout=1))
+
+    payload = resume_payload(session)
+    assert session.websocket.close_code == 1012
+    assert payload["last_message_id"] == 3
+    assert payload["pending_reply"] is False
+    assert session.websocket.frames[-1]["pending_reply"] is False
+
+
+def test_finished_turn_is_waited_for():
+    drainer = ConnectionDrainer()
+    session = new_session()
+    drainer.register(session)
+
+    async def turn():
+        await asyncio.sleep(0.01)
+        session.remember(message_id=4, role="Agent")
+
+    async def run():
+        running = asyncio.create_task(session.run_turn(turn()))
+        await asyncio.sleep(0)
+        await drainer.drain(timeout=1)
+        await running
+
+    asyncio.run(run())
+    payload = resume_payload(session)
+    assert payload["last_message_id"] == 4
+    assert payload["pending_reply"] is False
+
+
+def test_timed_out_turn_is_cancelled_before_the_token_is_issued():
+    drainer = ConnectionDrainer()
+    session = new_session()
+    session.remember(message_id=5, role="User")
+    drainer.register(session)
+    saved = []
+
+    async def slow_turn():
+        await asyncio.sleep(10)
+        saved.append("reply")
+
+    async def run():
+        running = asyncio.create_task(session.run_turn(slow_turn()))
+        await asyncio.sleep(0)
+        await drainer.drain(timeout=0.01)
+        assert session.turn_task.cancelled()
+        await running
+
+    asyncio.run(run())
+    payload = resume_payload(session)
+    assert saved == []
+    assert payload["pending_reply"] is True
+    assert session.websocket.frames[-1]["pending_reply"] is True
+    assert payload["last_role"] == "User"
+
+
+def test_resume_token_is_not_a_login_token():
+    session = new_session()
+    token = create_resume_token(session=session)
+
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(get_current_user(token=token))
+    assert error.value.status_code == 401
+    assert isinstance(validation_token_from_cookie(token), RedirectResponse)
+
+    # Even a resume-typed token signed without the audience is refused.
+    unscoped = create_access_token(data={"sub": "alice", "type": "resume"})
+    with pytest.raises(HTTPException):
+        asyncio.run(get_current_user(token=unscoped))
+    assert isinstance(validation_token_from_cookie(unscoped), RedirectResponse)
+
+
+def test_access_token_is_not_a_resume_token():
+    token = create_access_token(data={"sub": "alice"})
+    assert decode_resume_token(token=token, username="alice") is None
@@ -0,0 +1,110 @@
+import asyncio
+import json
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from routers.chat_router import router as chat_module
+from routers.chat_router.services import ChatSession, ConnectionDrainer, create_resume_token
+
+
+class FakeUser:
+    id = 1
+    username = "alice"
+
+
+class FakeWebSocket:
+    def __init__(self):
+        self.frames = []
+
+    async def send_text(self, text):
+        self.frames.append(json.loads(text))
+
+
+async def allow(key):
+    return True
+
+
+@pytest.fixture
+def session(monkeypatch):
+    monkeypatch.setattr(chat_module.message_limiter, "acquire", allow)
+    monkeypatch.setattr(chat_module.llm_token_limiter, "acquire", allow)
+    return ChatSession(websocket=FakeWebSocket(), user=FakeUser())
+
+
+def send(session, conversation_id):
+    frame = json.dumps({"content": "hi", "role": "User", "conversation_id": conversation_id})
+    asyncio.run(chat_module.process_message(session=session, json_user_message=frame))
+
+
+def test_invalid_conversation_id_is_answered_with_an_error(session):
+    send(session, "abc")
+    assert session.websocket.frames == [{"error": "Invalid conversation id"}]
+
+
+def test_unknown_conversation_is_answered_with_an_error(session, monkeypatch):
+    async def missing(*, user, conversation_id):
+        return None
+
+    monkeypatch.setattr(chat_module.history_cache, "load", missing)
+    send(session, 42)
+    assert session.websocket.frames == [{"error": "Conversation not found"}]
+
+
+@pytest.fixture
+def client(monkeypatch):
+    async def token_from_cookie(cookies):
+        return "token"
+
+    async def current_user(token):
+        return FakeUser()
+
+    monkeypatch.setattr(chat_module, "get_token_from_cookie_ws", token_from_cookie)
+    monkeypatch.setattr(chat_module, "get_current_user", current_user)
+    monkeypatch.setattr(chat_module, "drainer", ConnectionDrainer())
+    app = FastAPI()
+    app.include_router(chat_module.router)
+    return TestClient(app)
+
+
+def test_resume_token_is_read_from_the_first_frame(client, monkeypatch):
+    resumed = []
+
+    async def resume(*, session, resume_token):
+        resumed.append(resume_token)
+        await session.websocket.send_text(json.dumps({"resumed": True}))
+
+    monkeypatch.setattr(chat_module, "resume_session", resume)
+    with client.websocket_connect("/ws") as websocket:
+        websocket.send_text(json.dumps({"type": "resume", "resume_token": "abc"}))
+        assert websocket.receive_json() == {"resumed": True}
+    assert resumed == ["abc"]
+
+
+def test_frame_arriving_after_the_drain_is_dropped(client, monkeypatch):
+    processed = []
+
+    async def process(*, session, json_user_message):
+        processed.append(json_user_message)
+
+    monkeypatch.setattr(chat_module, "process_message", process)
+    with client.websocket_connect("/ws") as websocket:
+        chat_module.drainer.draining = True
+        websocket.send_text(json.dumps({"content": "hi", "role": "User", "conversation_id": 1}))
+        frame = websocket.receive_json()
+    assert frame["type"] == "reconnect" and frame["pending_reply"] is False
+    assert processed == []
+
+
+def test_resume_reads_from_the_primary(session, monkeypatch):
+    async def missing(*, user, conversation_id):
+        return None
+
+    monkeypatch.setattr(chat_module, "get_conversation", missing)
+    monkeypatch.setattr(chat_module.DB, "_recent_writes", {})
+    session.conversation_id = 7
+    token = create_resume_token(session=session)
+
+    asyncio.run(chat_module.resume_session(session=session, resume_token=token))
+    assert "alice" in chat_module.DB._recent_writes
@@ -0,0 +1,96 @@
+import asyncio
+
+from routers.chat_router import services as services_module
+from routers.chat_router.services import ActiveConversationCache
+
+
+class FakeUser:
+    def __init__(self, username):
+        self.username = username
+
+
+class FakeConversation:
+    def __init__(self, id, owner):
+        self.id = id
+        self.owner = owner
+
+
+class FakeMessage:
+    def __init__(self, role, content):
+        self.role = role
+        self.content = content
+
+
+class FakeDatabase:
+    def __init__(self):
+        self.conversations = {
+            1: FakeConversation(1, "alice"),
+            2: FakeConversation(2, "alice"),
+            3: FakeConversation(3, "bob"),
+        }
+        self.histories = {
+            1: [FakeMessage("User", "hi"), FakeMessage("Agent", "hello")],
+            2: [FakeMessage("User", "second thread")],
+        }
+        self.history_loads = 0
+
+    async def get_conversation(self, *, user, conversation_id):
+        conversation = self.conversations.get(conversation_id)
+        return conversation if conversation and conversation.owner == user.username else None
+
+    async def get_chat_history(self, *, user, conversation):
+        self.history_loads += 1
+        return self.histories.get(conversation.id, [])
+
+
+def make_cache(monkeypatch):
+    database = FakeDatabase()
+    monkeypatch.setattr(services_module, "get_conversation", database.get_conversation)
+    monkeypatch.setattr(services_module, "get_chat_history", database.get_chat_history)
+    return ActiveConversationCache(), database
+
+
+def test_load_reads_history_once_and_then_hits_the_cache(monkeypatch):
+    cache, database = make_cache(monkeypatch)
+    alice = FakeUser("alice")
+
+    first = asyncio.run(cache.load(user=alice, conversation_id=1))
+    second = asyncio.run(cache.load(user=alice, conversation_id=1))
+
+    assert first[1] == [("User", "hi"), ("Agent", "hello")]
+    assert second is first
+    assert database.history_loads == 1
+
+
+def test_switching_conversation_replaces_the_cached_one(monkeypatch):
+    cache, database = make_cache(monkeypatch)
+    alice = FakeUser("alice")
+
+    asyncio.run(cache.load(user=alice, conversation_id=1))
+    conversation, history = asyncio.run(cache.load(user=alice, conversation_id=2))
+    asyncio.run(cache.load(user=alice, conversation_id=1))
+
+    assert conversation.id == 2 and history == [("User", "second thread")]
+    assert len(cache._entries) == 1
+    assert database.history_loads == 3
+
+
+def test_foreign_conversation_is_not_loaded(monkeypatch):
+    cache, _ = make_cache(monkeypatch)
+    assert asyncio.run(cache.load(user=FakeUser("alice"), conversation_id=3)) is None
+    assert cache._entries == {}
+
+
+def test_activate_and_evict(monkeypatch):
+    cache, database = make_cache(monkeypatch)
+    alice = FakeUser("alice")
+
+    history = cache.activate(user=alice, conversation=FakeConversation(4, "alice"))
+    history.append(("User", "new thread"))
+    conversation, cached = asyncio.run(cache.load(user=alice, conversation_id=4))
+    assert conversation.id == 4 and cached == [("User", "new thread")]
+    assert database.history_loads == 0
+
+    cache.evict(username="alice")
+    cache.evict(username="nobody")
+    assert cache._entries == {}
@@ -0,0 +1,59 @@
+import asyncio
+
+import pytest
+
+from db import db_migrations
+from db.db_migrations import LEGACY_CONVERSATION_TITLE, migrate_legacy_messages
+from db.db_singleton import PRIMARY_CONNECTION
+
+
+class FakeConnection:
+    def __init__(self, moved_rows=(), fail=False):
+        self.scripts = []
+        self.queries = []
+        self.moved_rows = list(moved_rows)
+        self.fail = fail
+
+    async def execute_script(self, query):
+        self.scripts.append(query)
+
+    async def execute_query(self, query, values):
+        if self.fail:
+            raise ConnectionError("db is down")
+        self.queries.append((query, values))
+        return len(self.moved_rows), self.moved_rows
+
+
+class FakeConnections:
+    def __init__(self, connection):
+        self.connection = connection
+        self.names = []
+
+    def get(self, name):
+        self.names.append(name)
+        return self.connection
+
+
+def install(monkeypatch, connection):
+    fake = FakeConnections(connection)
+    monkeypatch.setattr(db_migrations, "connections", fake)
+    return fake
+
+
+def test_migration_adds_the_column_and_backfills_on_the_primary(monkeypatch):
+    connection = FakeConnection(moved_rows=[{"id": 1}, {"id": 2}])
+    fake = install(monkeypatch, connection)
+
+    asyncio.run(migrate_legacy_messages())
+
+    assert fake.names == [PRIMARY_CONNECTION]
+    assert 'ADD COLUMN IF NOT EXISTS "conversation_id"' in connection.scripts[0]
+    query, values = connection.queries[0]
+    assert 'WHERE "conversation_id" IS NULL GROUP BY "user_id"' in query
+    assert values == [LEGACY_CONVERSATION_TITLE]
+
+
+def test_migration_errors_are_raised(monkeypatch):
+    install(monkeypatch, FakeConnection(fail=True))
+    with pytest.raises(ConnectionError):
+        asyncio.run(migrate_legacy_messages())
@@ -0,0 +1,103 @@
+import asyncio
+
+import pytest
+
+from db import db_singleton
+from db.db_singleton import PostgresDB, PRIMARY_CONNECTION
+
+
+class FakeConnection:
+    def __init__(self, name: str, fail: bool = False) -> None:
+        self.name = name
+        self.fail = fail
+        self.queries = 0
+
+    async def run(self) -> str:
+        self.queries += 1
+        if self.fail:
+            raise ConnectionError(f"{self.name} is down")
+        return self.name
+
+
+class FakeConnections:
+    def __init__(self, connections):
+        self._connections = connections
+
+    def get(self, name: str) -> FakeConnection:
+        return self._connections[name]
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(db_singleton.time, "monotonic", clock)
+    return clock
+
+
+@pytest.fixture
+def make_db(monkeypatch):
+    def make(replica_count: int = 2, failing=()):
+        monkeypatch.setattr(PostgresDB, "_instance", None)
+        db = PostgresDB(
+            dsn="postgres://primary",
+            replica_dsns=[f"postgres://replica{index}" for index in range(replica_count)],
+            read_your_writes_seconds=5.0,
+        )
+        fake = {PRIMARY_CONNECTION: FakeConnection(PRIMARY_CONNECTION)}
+        for index in range(replica_count):
+            name = f"replica_{index}"
+            fake[name] = FakeConnection(name, fail=name in failing)
+        monkeypatch.setattr(db_singleton, "connections", FakeConnections(fake))
+        return db, fake
+    return make
+
+
+def read(db: PostgresDB, key=None) -> str:
+    return asyncio.run(db.run_read(key, lambda connection: connection.run()))
+
+
+def test_without_replicas_reads_go_to_primary(make_db):
+    db, _ = make_db(replica_count=0)
+    assert [read(db) for _ in range(3)] == [PRIMARY_CONNECTION] * 3
+
+
+def test_reads_round_robin_over_replicas(make_db):
+    db, _ = make_db(replica_count=2)
+    assert [read(db) for _ in range(4)] == ["replica_0", "replica_1", "replica_0", "replica_1"]
+
+
+def test_failed_replica_falls_back_to_primary_and_is_marked_unhealthy(make_db):
+    db, fake = make_db(replica_count=2, failing=("replica_0",))
+    assert read(db) == PRIMARY_CONNECTION
+    assert fake["replica_0"].queries == 1
+    # The failed replica is skipped from now on.
+    assert [read(db) for _ in range(3)] == ["replica_1"] * 3
+    assert fake["replica_0"].queries == 1
+
+
+def test_no_healthy_replica_reads_go_to_primary(make_db):
+    db, _ = make_db(replica_count=1, failing=("replica_0",))
+    assert read(db) == PRIMARY_CONNECTION
+    assert read(db) == PRIMARY_CONNECTION
+
+
+def test_read_your_writes_window(make_db, clock):
+    db, _ = make_db(replica_count=1)
+    db.mark_write("alice")
+
+    assert read(db, "alice") == PRIMARY_CONNECTION
+    assert read(db, "bob") == "replica_0"
+
+    clock.now += 4.9
+    assert read(db, "alice") == PRIMARY_CONNECTION
+
+    clock.now += 0.2
+    assert read(db, "alice") == "replica_0"
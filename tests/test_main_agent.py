@@ -0,0 +1,107 @@
+import asyncio
+
+from langchain_core.messages import AIMessage
+
+from agent import main_agent as agent_module
+from agent.main_agent import MainAgent
+
+
+class FakeLedger:
+    def __init__(self):
+        self.records = []
+
+    def record(self, **kwargs):
+        self.records.append(kwargs)
+
+
+class FakeModel:
+    def __init__(self, delays):
+        self.delays = delays
+        self.started = []
+        self.cancelled = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def ainvoke(self, messages):
+        index = int(messages[-1].content)
+        self.started.append(index)
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.delays[index])
+        except asyncio.CancelledError:
+            self.cancelled.append(index)
+            raise
+        finally:
+            self.in_flight -= 1
+        if self.delays[index] < 0:
+            raise RuntimeError("model failed")
+        return AIMessage(content=f"reply {index}")
+
+
+def make_agent(monkeypatch, delays):
+    agent = MainAgent()
+    model = FakeModel(delays)
+    ledger = FakeLedger()
+    monkeypatch.setattr(agent, "model", model)
+    monkeypatch.setattr(agent_module, "usage_ledger", ledger)
+
+    async def prompt():
+        return "You are a test agent"
+
+    monkeypatch.setattr(agent, "prompt_template", prompt)
+    return agent, model, ledger
+
+
+def histories(count):
+    return [[("User", str(index))] for index in range(count)]
+
+
+def test_batch_respects_concurrency_and_reports_failures(monkeypatch):
+    agent, model, ledger = make_agent(monkeypatch, [0.02, 0.01, 0, 0])
+    model.delays[3] = -1
+
+    async def run():
+        return [
+            item async for item in agent.generate_batch(
+                chat_histories=histories(4), max_concurrency=2, user_id=1
+            )
+        ]
+
+    results = dict(asyncio.run(run()))
+    assert results[0] == "reply 0" and results[2] == "reply 2"
+    assert isinstance(results[3], RuntimeError)
+    assert model.max_in_flight == 2
+    assert len(ledger.records) == 3
+
+
+def test_closing_the_batch_cancels_running_calls(monkeypatch):
+    agent, model, ledger = make_agent(monkeypatch, [0, 10, 10, 10])
+
+    async def run():
+        replies = agent.generate_batch(chat_histories=histories(4), max_concurrency=2, user_id=1)
+        first = await replies.__anext__()
+        await replies.aclose()
+        return first
+
+    assert asyncio.run(run()) == (0, "reply 0")
+    assert sorted(model.cancelled) == sorted(set(model.started) - {0})
+    assert model.in_flight == 0
+    assert len(ledger.records) == 1
+
+
+def test_batch_latency_is_measured_per_call(monkeypatch):
+    agent, model, ledger = make_agent(monkeypatch, [0.05] * 4)
+
+    async def run():
+        return [
+            item async for item in agent.generate_batch(
+                chat_histories=histories(4), max_concurrency=1, user_id=1
+            )
+        ]
+
+    asyncio.run(run())
+    latencies = [record["latency_ms"] for record in ledger.records]
+    # Run one at a time, the last reply would record about 200 ms if timed from the start of the batch.
+    assert len(latencies) == 4
+    assert all(40 <= latency < 120 for latency in latencies)
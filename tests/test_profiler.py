@@ -0,0 +1,39 @@
+import asyncio
+import threading
+import time
+
+from tracing.profiler import profile_cpu
+
+
+def busy_loop_work(seconds):
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        pass
+
+
+def waiting_thread_work(stop):
+    stop.wait()
+
+
+def test_profile_samples_only_the_busy_event_loop():
+    stop = threading.Event()
+    waiter = threading.Thread(target=waiting_thread_work, args=(stop,))
+    waiter.start()
+
+    async def run():
+        profiling = asyncio.create_task(profile_cpu(seconds=0.3, interval=0.005))
+        await asyncio.sleep(0.05)
+        busy_loop_work(0.1)
+        return await profiling
+
+    try:
+        profile = asyncio.run(run())
+    finally:
+        stop.set()
+        waiter.join()
+
+    lines = profile.strip().splitlines()
+    # Only the loop thread was sampled, and only while it was running code.
+    assert "busy_loop_work" in lines[0]
+    assert "waiting_thread_work" not in profile
+    assert "selectors.py" not in profile
@@ -0,0 +1,100 @@
+import asyncio
+
+from rate_limiter import rate_limiter
+from rate_limiter.rate_limiter import InMemoryRateLimitStore, RateLimiter
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def make_limiter(monkeypatch, *, capacity: int = 3, period_seconds: int = 60, sweep_interval: float = 60.0):
+    clock = FakeClock()
+    monkeypatch.setattr(rate_limiter.time, "monotonic", clock)
+    store = InMemoryRateLimitStore(sweep_interval=sweep_interval)
+    limiter = RateLimiter(name="test", store=store, capacity=capacity, period_seconds=period_seconds)
+    return limiter, store, clock
+
+
+def test_bucket_allows_capacity_then_refills(monkeypatch):
+    limiter, _, clock = make_limiter(monkeypatch)
+
+    async def run():
+        assert [await limiter.acquire("alice") for _ in range(4)] == [True, True, True, False]
+        # One token is refilled every 20 seconds.
+        clock.now += 20
+        assert await limiter.acquire("alice")
+        assert not await limiter.acquire("alice")
+
+    asyncio.run(run())
+
+
+def test_buckets_are_independent_per_key(monkeypatch):
+    limiter, _, _ = make_limiter(monkeypatch, capacity=1)
+
+    async def run():
+        assert await limiter.acquire("alice")
+        assert not await limiter.acquire("alice")
+        assert await limiter.acquire("bob")
+
+    asyncio.run(run())
+
+
+def test_charge_puts_bucket_into_debt(monkeypatch):
+    limiter, _, clock = make_limiter(monkeypatch, capacity=3)
+
+    async def run():
+        await limiter.charge("alice", 6)
+        # 3 - 6 = -3 tokens: four refills (80 seconds) are needed before one token is available.
+        clock.now += 60
+        assert not await limiter.acquire("alice")
+        clock.now += 20
+        assert await limiter.acquire("alice")
+
+    asyncio.run(run())
+
+
+def test_refill_is_capped_at_capacity(monkeypatch):
+    limiter, _, clock = make_limiter(monkeypatch, capacity=2)
+
+    async def run():
+        assert await limiter.acquire("alice")
+        clock.now += 3600
+        assert [await limiter.acquire("alice") for _ in range(3)] == [True, True, False]
+
+    asyncio.run(run())
+
+
+def test_full_buckets_are_evicted(monkeypatch):
+    limiter, store, clock = make_limiter(monkeypatch, capacity=3, sweep_interval=10)
+
+    async def run():
+        for username in ("alice", "bob", "carol"):
+            await limiter.acquire(username)
+        assert len(store._buckets) == 3
+
+        # After a full refill the next take sweeps the old buckets and keeps only its own.
+        clock.now += 60
+        for _ in range(3):
+            await limiter.acquire("dave")
+        assert set(store._buckets) == {"test:dave"}
+
+    asyncio.run(run())
+
+
+def test_drained_buckets_survive_the_sweep(monkeypatch):
+    limiter, store, clock = make_limiter(monkeypatch, capacity=3, sweep_interval=10)
+
+    async def run():
+        for _ in range(3):
+            await limiter.acquire("alice")
+        clock.now += 10
+        await limiter.acquire("bob")
+        assert "test:alice" in store._buckets
+        assert not await limiter.acquire("alice")
+
+    asyncio.run(run())
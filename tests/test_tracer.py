@@ -0,0 +1,82 @@
+import asyncio
+import json
+from typing import List
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from tracing.middleware import TracingMiddleware
+from tracing.tracer import FileSpanExporter, Span, SpanExporter, Tracer
+
+
+class ListExporter(SpanExporter):
+    def __init__(self) -> None:
+        self.spans: List[Span] = []
+
+    def export(self, span: Span) -> None:
+        self.spans.append(span)
+
+
+def test_child_spans_share_the_root_trace():
+    exporter = ListExporter()
+    tracer = Tracer(exporter=exporter, sample_rate=1.0)
+
+    @tracer.traced("inner")
+    async def inner() -> None:
+        pass
+
+    async def run() -> None:
+        with tracer.span("root"):
+            await inner()
+
+    asyncio.run(run())
+    inner_span, root_span = exporter.spans
+    assert root_span.parent_id is None
+    assert inner_span.parent_id == root_span.span_id
+    assert inner_span.trace_id == root_span.trace_id
+
+
+def test_unsampled_traces_export_nothing():
+    exporter = ListExporter()
+    tracer = Tracer(exporter=exporter, sample_rate=0.0)
+
+    with tracer.span("root") as span:
+        span.set_attribute("ignored", True)
+        with tracer.span("child"):
+            pass
+
+    assert exporter.spans == []
+
+
+def test_file_exporter_writes_in_background_and_flushes_on_shutdown(tmp_path):
+    path = tmp_path / "traces.jsonl"
+    exporter = FileSpanExporter(path=str(path), flush_interval=60)
+    tracer = Tracer(exporter=exporter, sample_rate=1.0)
+
+    for name in ("first", "second"):
+        with tracer.span(name):
+            pass
+    tracer.shutdown()
+
+    names = [json.loads(line)["name"] for line in path.read_text().splitlines()]
+    assert names == ["first", "second"]
+
+
+def test_middleware_makes_request_the_root_span():
+    exporter = ListExporter()
+    tracer = Tracer(exporter=exporter, sample_rate=1.0)
+    app = FastAPI()
+    app.add_middleware(TracingMiddleware, tracer=tracer)
+
+    @app.get("/ping")
+    async def ping() -> dict:
+        with tracer.span("db.query"):
+            return {"ok": True}
+
+    response = TestClient(app).get("/ping")
+
+    assert response.status_code == 200
+    query_span, request_span = exporter.spans
+    assert request_span.name == "http.request"
+    assert request_span.attributes == {"method": "GET", "path": "/ping", "status_code": 200}
+    assert query_span.parent_id == request_span.span_id
@@ -0,0 +1,99 @@
+import asyncio
+
+from usage import usage_ledger as usage_module
+from usage.usage_ledger import UsageLedger
+
+
+def record(ledger: UsageLedger, user_id: int = 1) -> None:
+    ledger.record(user_id=user_id, prompt_tokens=10, completion_tokens=5, latency_ms=100.0)
+
+
+def totals(rows):
+    return {row[0]: row[2:] for row in rows}
+
+
+def test_flush_aggregates_per_user_and_bucket(monkeypatch):
+    saved = []
+
+    async def save(*, rows):
+        saved.extend(rows)
+
+    monkeypatch.setattr(usage_module, "save_usage_rollups", save)
+    ledger = UsageLedger(bucket_seconds=3600, flush_interval=60)
+    record(ledger, user_id=1)
+    record(ledger, user_id=1)
+    record(ledger, user_id=2)
+
+    asyncio.run(ledger.flush())
+
+    assert totals(saved) == {1: (20, 10, 2, 200.0), 2: (10, 5, 1, 100.0)}
+    assert ledger._pending == {}
+
+
+def test_failed_flush_merges_counters_back(monkeypatch):
+    saved = []
+    fail = [True]
+
+    async def save(*, rows):
+        if fail[0]:
+            raise ConnectionError("db is down")
+        saved.extend(rows)
+
+    monkeypatch.setattr(usage_module, "save_usage_rollups", save)
+    ledger = UsageLedger(bucket_seconds=3600, flush_interval=60)
+    record(ledger)
+
+    async def run():
+        await ledger.flush()
+        record(ledger)
+        fail[0] = False
+        await ledger.flush()
+
+    asyncio.run(run())
+    assert totals(saved) == {1: (20, 10, 2, 200.0)}
+
+
+def test_stop_during_a_flush_loses_nothing(monkeypatch):
+    saved = []
+    writing = asyncio.Event()
+
+    async def slow_save(*, rows):
+        writing.set()
+        await asyncio.sleep(0.05)
+        saved.extend(rows)
+
+    monkeypatch.setattr(usage_module, "save_usage_rollups", slow_save)
+    ledger = UsageLedger(bucket_seconds=3600, flush_interval=0.01)
+
+    async def run():
+        record(ledger)
+        ledger.start()
+        await writing.wait()
+        # Recorded while the first write is in progress.
+        record(ledger)
+        await ledger.stop()
+
+    asyncio.run(run())
+    assert sum(row[4] for row in saved) == 2
+    assert ledger._pending == {}
+
+
+def test_cancelled_write_restores_counters(monkeypatch):
+    async def hanging_save(*, rows):
+        await asyncio.sleep(10)
+
+    monkeypatch.setattr(usage_module, "save_usage_rollups", hanging_save)
+    ledger = UsageLedger(bucket_seconds=3600, flush_interval=60)
+    record(ledger)
+
+    async def run():
+        task = asyncio.create_task(ledger.flush())
+        await asyncio.sleep(0.01)
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+
+    asyncio.run(run())
+    assert list(ledger._pending.values()) == [[10, 5, 1, 100.0]]
@@ -0,0 +1,28 @@
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from tracing.tracer import Tracer
+
+
+class TracingMiddleware:
+    """
+    ASGI middleware opening a root span for every HTTP request, so the spans of one request
+    (authentication, repository queries and so on) are sampled and exported as a single trace.
+    WebSocket connections open their own spans per connection and chat turn.
+    """
+
+    def __init__(self, app: ASGIApp, tracer: Tracer) -> None:
+        self.app = app
+        self.tracer = tracer
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        with self.tracer.span("http.request", method=scope["method"], path=scope["path"]) as span:
+            async def send_with_status(message: Message) -> None:
+                if message["type"] == "http.response.start":
+                    span.set_attribute("status_code", message["status"])
+                await send(message)
+
+            await self.app(scope, receive, send_with_status)
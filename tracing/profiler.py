@@ -0,0 +1,101 @@
+import asyncio
+import inspect
+import selectors
+import sys
+import threading
+from collections import Counter
+from types import CodeType, FrameType
+from typing import List, Optional, Set
+
+_profile_lock = asyncio.Lock()
+
+_TASK_CODE_FLAGS: int = (
+    inspect.CO_COROUTINE | inspect.CO_ASYNC_GENERATOR | inspect.CO_ITERABLE_COROUTINE | inspect.CO_GENERATOR
+)
+
+
+def _collapse_stack(frame: Optional[FrameType]) -> str:
+    """
+    Convert a frame and its callers into a `root;...;leaf` stack string.
+    """
+    names: List[str] = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f"{code.co_name} ({code.co_filename}:{code.co_firstlineno})")
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+def _loop_driver_codes(frame: Optional[FrameType]) -> Set[CodeType]:
+    """
+    Return the code objects of the frames running the event loop underneath the current task.
+
+    While the loop has nothing to run, one of these frames (or the selector's `select`) is at
+    the top of the loop thread's stack: with uvloop the C loop adds no Python frames of its own.
+    """
+    while frame is not None and frame.f_code.co_flags & _TASK_CODE_FLAGS:
+        frame = frame.f_back
+    codes: Set[CodeType] = set()
+    while frame is not None:
+        codes.add(frame.f_code)
+        frame = frame.f_back
+    return codes
+
+
+def _sample(
+    thread_id: int,
+    idle_codes: Set[CodeType],
+    stop: threading.Event,
+    interval: float,
+    samples: Counter,
+) -> None:
+    """
+    Sample the stack of the thread `thread_id` every `interval` seconds until `stop` is set.
+    Samples taken while the thread's event loop is idle are skipped.
+    """
+    while not stop.wait(interval):
+        frame: Optional[FrameType] = sys._current_frames().get(thread_id)
+        if frame is None or frame.f_code in idle_codes or frame.f_code.co_filename == selectors.__file__:
+            continue
+        samples[_collapse_stack(frame)] += 1
+
+
+async def profile_cpu(*, seconds: float, interval: float) -> str:
+    """
+    Capture a sampling CPU profile of the running worker.
+
+    A background thread samples the event loop thread's stack while the loop keeps serving
+    requests. Idle samples (the loop waiting in its selector) and other threads, such as span
+    writers and `to_thread` workers, are left out, so the result shows where the loop spends CPU.
+
+    Args:
+        seconds (float): How long to sample.
+        interval (float): Seconds between samples.
+
+    Returns:
+        str: The profile in collapsed stack format (`frame;frame;frame count` per line),
+             accepted by flamegraph.pl, speedscope and similar tools.
+
+    Raises:
+        RuntimeError: If another profile is already being captured.
+    """
+    if _profile_lock.locked():
+        raise RuntimeError("A profile is already being captured")
+
+    async with _profile_lock:
+        samples: Counter = Counter()
+        stop = threading.Event()
+        sampler = threading.Thread(
+            target=_sample,
+            args=(threading.get_ident(), _loop_driver_codes(sys._getframe()), stop, interval, samples),
+            name="cpu-profiler",
+            daemon=True,
+        )
+        sampler.start()
+        try:
+            await asyncio.sleep(seconds)
+        finally:
+            stop.set()
+            await asyncio.to_thread(sampler.join)
+
+    return "\n".join(f"{stack} {count}" for stack, count in samples.most_common()) + "\n"
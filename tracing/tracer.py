@@ -0,0 +1,257 @@
+import json
+import queue
+import random
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from logger.logger import logger
+
+
+class Span:
+    """
+    A single timed operation of a trace.
+    """
+
+    def __init__(self, *, name: str, trace_id: str, parent_id: Optional[str], attributes: Dict[str, Any]) -> None:
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent_id
+        self.attributes = attributes
+        self.start_time = time.time()
+        self._started_at = time.perf_counter()
+        self.duration_ms: Optional[float] = None
+        self.error: Optional[str] = None
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        """
+        Attach an attribute to the span.
+
+        Args:
+            key (str): The attribute name.
+            value (Any): The attribute value.
+        """
+        self.attributes[key] = value
+
+    def finish(self) -> None:
+        """
+        Record the span duration.
+        """
+        self.duration_ms = (time.perf_counter() - self._started_at) * 1000
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Convert the span to a JSON serializable dict.
+
+        Returns:
+            Dict[str, Any]: The span data.
+        """
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start_time": self.start_time,
+            "duration_ms": self.duration_ms,
+            "attributes": self.attributes,
+            "error": self.error,
+        }
+
+
+class NoopSpan:
+    """
+    Span returned for traces that are not sampled.
+    """
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        pass
+
+
+class SpanExporter(ABC):
+    """
+    Destination of finished spans.
+    """
+
+    @abstractmethod
+    def export(self, span: Span) -> None:
+        """
+        Export a finished span.
+
+        Args:
+            span (Span): The finished span.
+        """
+
+    def shutdown(self) -> None:
+        """
+        Flush buffered spans and release resources.
+        """
+
+
+class ConsoleSpanExporter(SpanExporter):
+    """
+    Write finished spans to the application log.
+    """
+
+    def export(self, span: Span) -> None:
+        indent = "  " if span.parent_id else ""
+        logger.info(f"[trace {span.trace_id[:8]}] {indent}{span.name} {span.duration_ms:.2f}ms {span.attributes}")
+
+
+class FileSpanExporter(SpanExporter):
+    """
+    Append finished spans to a JSON lines file.
+
+    Spans are only queued on the event loop; a background thread writes them to the file
+    in batches every `flush_interval` seconds, so tracing adds no disk I/O to request handling.
+    """
+
+    _STOP = object()
+
+    def __init__(self, path: str, flush_interval: float = 1.0) -> None:
+        self._path = path
+        self._flush_interval = flush_interval
+        self._queue: queue.SimpleQueue = queue.SimpleQueue()
+        self._writer = threading.Thread(target=self._write_loop, name="span-file-exporter", daemon=True)
+        self._writer.start()
+
+    def export(self, span: Span) -> None:
+        self._queue.put(span.to_dict())
+
+    def shutdown(self) -> None:
+        self._queue.put(self._STOP)
+        self._writer.join()
+
+    def _write_loop(self) -> None:
+        """
+        Collect queued spans and append them to the file until shutdown.
+        """
+        stopped = False
+        while not stopped:
+            batch: List[Dict[str, Any]] = []
+            try:
+                item = self._queue.get(timeout=self._flush_interval)
+                while True:
+                    if item is self._STOP:
+                        stopped = True
+                        break
+                    batch.append(item)
+                    item = self._queue.get_nowait()
+            except queue.Empty:
+                pass
+            if batch:
+                try:
+                    with open(self._path, "a", encoding="utf-8") as file:
+                        file.writelines(json.dumps(span, default=str) + "\n" for span in batch)
+                except Exception as ex:
+                    logger.error(f"An error occurred in writing {len(batch)} spans to {self._path}: {ex}")
+
+
+_current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+_sampled: ContextVar[Optional[bool]] = ContextVar("trace_sampled", default=None)
+
+
+class Tracer:
+    """
+    Minimal span based tracer. The sampling decision is taken once per trace at its root span
+    and inherited by all child spans, so a trace is either recorded completely or not at all.
+    """
+
+    def __init__(self, *, exporter: SpanExporter, sample_rate: float) -> None:
+        """
+        Initialize the tracer.
+
+        Args:
+            exporter (SpanExporter): The destination of finished spans.
+            sample_rate (float): The fraction of traces to record, from 0.0 to 1.0.
+        """
+        self.exporter = exporter
+        self.sample_rate = sample_rate
+
+    def set_exporter(self, exporter: SpanExporter) -> None:
+        """
+        Replace the span exporter.
+
+        Args:
+            exporter (SpanExporter): The new destination of finished spans.
+        """
+        self.exporter = exporter
+
+    def shutdown(self) -> None:
+        """
+        Flush the spans still buffered by the exporter.
+        """
+        self.exporter.shutdown()
+
+    @contextmanager
+    def span(self, name: str, **attributes: Any) -> Iterator[Any]:
+        """
+        Record a span around the wrapped block. Starts a new trace if there is no current span.
+
+        Args:
+            name (str): The span name.
+            **attributes (Any): Attributes attached to the span.
+
+        Yields:
+            Union[Span, NoopSpan]: The active span.
+        """
+        parent: Optional[Span] = _current_span.get()
+        sampled: Optional[bool] = _sampled.get()
+        if sampled is None:
+            sampled = self.sample_rate > 0 and random.random() < self.sample_rate
+            sampled_token = _sampled.set(sampled)
+        else:
+            sampled_token = None
+
+        if not sampled:
+            try:
+                yield NoopSpan()
+            finally:
+                if sampled_token is not None:
+                    _sampled.reset(sampled_token)
+            return
+
+        span = Span(
+            name=name,
+            trace_id=parent.trace_id if parent else uuid.uuid4().hex,
+            parent_id=parent.span_id if parent else None,
+            attributes=attributes,
+        )
+        span_token = _current_span.set(span)
+        try:
+            yield span
+        except Exception as ex:
+            span.error = repr(ex)
+            raise
+        finally:
+            span.finish()
+            _current_span.reset(span_token)
+            if sampled_token is not None:
+                _sampled.reset(sampled_token)
+            try:
+                self.exporter.export(span)
+            except Exception as ex:
+                logger.error(f"An error occurred in exporting span {span.name}: {ex}")
+
+    def traced(self, name: str) -> Callable:
+        """
+        Decorator recording a span around every call of an async function.
+
+        Args:
+            name (str): The span name.
+
+        Returns:
+            Callable: The decorator.
+        """
+        def decorator(func: Callable) -> Callable:
+            @wraps(func)
+            async def wrapper(*args: Any, **kwargs: Any) -> Any:
+                with self.span(name):
+                    return await func(*args, **kwargs)
+            return wrapper
+        return decorator
@@ -0,0 +1,11 @@
+from settings import settings
+from tracing.tracer import Tracer, SpanExporter, ConsoleSpanExporter, FileSpanExporter
+
+
+exporter: SpanExporter = (
+    FileSpanExporter(path=settings.TRACE_FILE_PATH)
+    if settings.TRACE_EXPORTER == "file"
+    else ConsoleSpanExporter()
+)
+
+tracer = Tracer(exporter=exporter, sample_rate=settings.TRACE_SAMPLE_RATE)
@@ -0,0 +1,113 @@
+import asyncio
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+from db.db_repository import save_usage_rollups
+from logger.logger import logger
+
+# (user_id, bucket_start) -> [prompt_tokens, completion_tokens, replies, total_latency_ms]
+Counters = Dict[Tuple[int, datetime], List[float]]
+
+
+class UsageLedger:
+    """
+    Per-user LLM usage accounting.
+
+    Replies are only added to in-memory counters per user and time bucket; a background
+    task flushes them to the rollup table in one batched upsert, so accounting adds no
+    database write to the chat hot path.
+    """
+
+    def __init__(self, *, bucket_seconds: int, flush_interval: float) -> None:
+        """
+        Initialize the ledger.
+
+        Args:
+            bucket_seconds (int): The size of a rollup time bucket.
+            flush_interval (float): Seconds between flushes to the database.
+        """
+        self._bucket_seconds = bucket_seconds
+        self._flush_interval = flush_interval
+        self._pending: Counters = {}
+        self._flush_task: Optional[asyncio.Task] = None
+        self._flush_lock: Optional[asyncio.Lock] = None
+
+    def record(self, *, user_id: int, prompt_tokens: int, completion_tokens: int, latency_ms: float) -> None:
+        """
+        Add one reply to the in-memory counters.
+
+        Args:
+            user_id (int): The user the reply was generated for.
+            prompt_tokens (int): The number of prompt tokens.
+            completion_tokens (int): The number of completion tokens.
+            latency_ms (float): The generation latency in milliseconds.
+        """
+        now = int(time.time())
+        bucket_start = datetime.fromtimestamp(now - now % self._bucket_seconds, tz=timezone.utc)
+        counters = self._pending.setdefault((user_id, bucket_start), [0, 0, 0, 0.0])
+        counters[0] += prompt_tokens
+        counters[1] += completion_tokens
+        counters[2] += 1
+        counters[3] += latency_ms
+
+    async def flush(self) -> None:
+        """
+        Write the pending counters to the rollup table. Counters are kept for the next flush if the write
+        fails or is cancelled, and only one write runs at a time.
+        """
+        if self._flush_lock is None:
+            self._flush_lock = asyncio.Lock()
+        async with self._flush_lock:
+            if not self._pending:
+                return
+            pending, self._pending = self._pending, {}
+            try:
+                await save_usage_rollups(rows=[
+                    (user_id, bucket_start, int(prompt), int(completion), int(replies), latency)
+                    for (user_id, bucket_start), (prompt, completion, replies, latency) in pending.items()
+                ])
+            except BaseException as ex:
+                self._restore(pending)
+                if not isinstance(ex, Exception):
+                    raise
+                logger.error(f"An error occurred in flushing usage ledger: {ex}")
+
+    def _restore(self, pending: Counters) -> None:
+        """
+        Merge counters that could not be written back into the pending ones.
+        """
+        for key, counters in pending.items():
+            merged = self._pending.setdefault(key, [0, 0, 0, 0.0])
+            for index, value in enumerate(counters):
+                merged[index] += value
+
+    def start(self) -> None:
+        """
+        Start the periodic background flush.
+        """
+        if self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._flush_loop())
+
+    async def stop(self) -> None:
+        """
+        Stop the background flush and write out whatever is still pending.
+        """
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            try:
+                await self._flush_task
+            except asyncio.CancelledError:
+                pass
+            self._flush_task = None
+        # Waits for a write interrupted by the cancellation above, then writes the rest.
+        await self.flush()
+
+    async def _flush_loop(self) -> None:
+        """
+        Flush the pending counters every `flush_interval` seconds.
+        """
+        while True:
+            await asyncio.sleep(self._flush_interval)
+            # Shielded, so stopping the loop never interrupts a write halfway.
+            await asyncio.shield(self.flush())
@@ -0,0 +1,8 @@
+from settings import settings
+from usage.usage_ledger import UsageLedger
+
+
+usage_ledger = UsageLedger(
+    bucket_seconds=settings.USAGE_BUCKET_SECONDS,
+    flush_interval=settings.USAGE_FLUSH_SECONDS,
+)